@@ -1,7 +1,25 @@
 """
 Helper functions to classify fairness assessment based on value segments
 """
-from metric_definitions import get_metric_definition
+import math
+import numpy as np
+from typing import Optional
+
+from metric_definitions import SEGMENT_LOOKUPS
+
+
+def _find_segment(lookup: dict, value: float) -> Optional[int]:
+    """Index of the value segment matching value, or None if it exceeds all thresholds"""
+    # Disparate impact matches on min/max bounds first (NaN never matches these)
+    if lookup['min_bounds'] is not None and not math.isnan(value):
+        match = lookup['min_matches'][np.searchsorted(lookup['min_bounds'], value, side='right')]
+        if match is not None:
+            return match
+    
+    # All other metrics use max value logic with absolute values
+    max_bounds = lookup['max_bounds']
+    idx = int(np.searchsorted(max_bounds, abs(value), side='left'))
+    return idx if idx < len(max_bounds) else None
 
 
 def classify_assessment(metric_name: str, value: float) -> str:
@@ -15,35 +33,16 @@ def classify_assessment(metric_name: str, value: float) -> str:
     Returns:
         Assessment string: "Fair", "Warning", or "Violation"
     """
-    metric_def = get_metric_definition(metric_name)
-    value_segments = metric_def.get('value_segments', [])
+    lookup = SEGMENT_LOOKUPS.get(metric_name)
     
-    if not value_segments:
+    if lookup is None:
         # Fallback to default thresholds if no segments defined
         return default_assessment(metric_name, value)
     
-    # Special handling for disparate_impact (uses min value logic)
-    if metric_name == "disparate_impact":
-        for segment in value_segments:
-            min_val = segment.get('min', float('-inf'))
-            max_val = segment.get('max', float('inf'))
-            
-            if min_val != float('-inf') and value >= min_val:
-                return segment['severity']
-            elif max_val != float('inf') and value < max_val:
-                return segment['severity']
-    
-    # For all other metrics (uses max value logic with absolute values)
-    abs_value = abs(value)
-    
-    for segment in value_segments:
-        max_val = segment.get('max', float('inf'))
-        
-        if abs_value <= max_val:
-            return segment['severity']
+    idx = _find_segment(lookup, value)
     
     # If no segment matched, return Violation
-    return "Violation"
+    return lookup['segments'][idx].severity if idx is not None else "Violation"
 
 
 def default_assessment(metric_name: str, value: float) -> str:
@@ -71,43 +70,22 @@ def get_value_segment_info(metric_name: str, value: float) -> dict:
     Returns:
         Dictionary with interpretation and severity
     """
-    metric_def = get_metric_definition(metric_name)
-    value_segments = metric_def.get('value_segments', [])
+    lookup = SEGMENT_LOOKUPS.get(metric_name)
     
-    if not value_segments:
+    if lookup is None:
         return {
             'interpretation': 'No segment information available',
             'severity': default_assessment(metric_name, value)
         }
     
-    # Special handling for disparate_impact
-    if metric_name == "disparate_impact":
-        for segment in value_segments:
-            min_val = segment.get('min', float('-inf'))
-            max_val = segment.get('max', float('inf'))
-            
-            if min_val != float('-inf') and value >= min_val:
-                return {
-                    'interpretation': segment['interpretation'],
-                    'severity': segment['severity']
-                }
-            elif max_val != float('inf') and value < max_val:
-                return {
-                    'interpretation': segment['interpretation'],
-                    'severity': segment['severity']
-                }
-    
-    # For all other metrics
-    abs_value = abs(value)
+    idx = _find_segment(lookup, value)
     
-    for segment in value_segments:
-        max_val = segment.get('max', float('inf'))
-        
-        if abs_value <= max_val:
-            return {
-                'interpretation': segment['interpretation'],
-                'severity': segment['severity']
-            }
+    if idx is not None:
+        segment = lookup['segments'][idx]
+        return {
+            'interpretation': segment.interpretation,
+            'severity': segment.severity
+        }
     
     # Default if no segment matched
     return {
@@ -1,77 +1,150 @@
+import functools
 import numpy as np
 import pandas as pd
 from typing import Dict, Any
-from sklearn.metrics import confusion_matrix
+
+# Assessment labels indexed by how many of the 0.1 / 0.2 difference thresholds are crossed
+ASSESSMENT_LEVELS = ("Fair", "Warning", "Violation")
+
+def memoized_metric(method):
+    """Cache a metric's result on the instance (metrics take no arguments)"""
+    @functools.wraps(method)
+    def wrapper(self):
+        name = method.__name__
+        if name not in self._results:
+            self._results[name] = method(self)
+        return self._results[name]
+    return wrapper
 
 class FairnessMetrics:
     """Calculate all 13 fairness metrics for bias detection - matches Streamlit implementation"""
     
+    # Metric method names, in the order they are reported
+    METRIC_METHODS = (
+        'demographic_parity',
+        'disparate_impact',
+        'equal_opportunity',
+        'predictive_equality',
+        'calibration_by_group',
+        'false_negative_rate_parity',
+        'false_discovery_rate_parity',
+        'accuracy_equality',
+        'predictive_parity_ppv',
+        'equalized_odds',
+        'statistical_parity_difference',
+        'average_odds_difference',
+        'theil_index',
+    )
+    
     def __init__(self, df: pd.DataFrame, protected_attr: str):
-        self.df = df.copy()
+        # Keep a reference only: derived columns live in standalone arrays, so the
+        # caller's frame is neither copied nor mutated
+        self.df = df
         self.protected_attr = protected_attr
         self.groups = df[protected_attr].unique()
-        
-        # Create predicted_shortlist from screening_score using median threshold (like Streamlit)
-        if 'screening_score' in self.df.columns:
-            self.threshold = self.df['screening_score'].median()
-            self.df['predicted_shortlist'] = (self.df['screening_score'] >= self.threshold).astype(int)
+        self._group_names = [str(group) for group in self.groups]
+        self._results = {}
+        
+        # Raw outcome buffer for NumPy-level reductions
+        self._y = df['shortlisted'].to_numpy(dtype=np.float32, copy=False)
+        
+        # Create predicted shortlist from screening_score using median threshold (like Streamlit),
+        # as a uint8 view of the comparison's bool buffer (no int64 Series, no copy)
+        if 'screening_score' in df.columns:
+            self._scores = df['screening_score'].to_numpy(dtype=np.float32, copy=False)
+            # nanmedian skips missing scores like pandas' median, without the Series overhead
+            self.threshold = float(np.nanmedian(self._scores))
+            self._yhat = np.greater_equal(self._scores, self.threshold).view(np.uint8)
         else:
+            self._scores = None
             self.threshold = None
-            self.df['predicted_shortlist'] = self.df['shortlisted']
-    
-    def _get_group_data(self, group):
-        """Get data for a specific group"""
-        return self.df[self.df[self.protected_attr] == group]
+            self._yhat = np.equal(df['shortlisted'].to_numpy(), 1).view(np.uint8)
+        
+        # Qualified candidates (screening_score >= median threshold) are exactly the predicted shortlist
+        self._qualified_mask = self._yhat.view(bool)
+        
+        # Compare groups on integer category codes rather than Python objects
+        attr_categories = df[protected_attr].astype('category')
+        self._codes = attr_categories.cat.codes.to_numpy()
+        self._group_codes = {group: code for code, group in enumerate(attr_categories.cat.categories)}
+        
+        # One groupby split shared by every per-group lookup (a missing-value group
+        # matches no rows, as before)
+        self._gb = df.groupby(attr_categories, sort=False, observed=True)
+        group_positions = self._gb.indices
+        no_rows = np.empty(0, dtype=np.intp)
+        self._group_idx = {group: group_positions.get(group, no_rows) for group in self.groups}
+        self._y_by_group = {group: self._y[idx] for group, idx in self._group_idx.items()}
+        
+        # Shortlisting rate per group (in self.groups order), shared by the rate-based metrics
+        self._rates_series = self._gb['shortlisted'].mean()
+        self._group_rates = self._rates_series.reindex(self.groups).to_numpy(dtype=np.float64)
+        
+        # Per-group confusion matrix counts in one pass over all rows: cell 2*y + yhat
+        # indexes (tn, fp, fn, tp), and category code + 1 selects the row (row 0 collects
+        # missing values)
+        y = (df['shortlisted'].to_numpy() == 1).astype(np.intp)
+        cells = (self._codes.astype(np.intp) + 1) * 4 + 2 * y + self._yhat
+        n_rows = len(self._group_codes) + 1
+        counts = np.bincount(cells, minlength=4 * n_rows).reshape(n_rows, 4)
+        
+        # Reorder into a (n_groups x 4) table in self.groups order; row 0 is reused as
+        # all zeros for a missing-value group, which matches no rows
+        counts[0] = 0
+        rows = np.array([self._group_codes.get(group, -1) + 1 for group in self.groups], dtype=np.intp)
+        self._cm_table = counts[rows]
+        self._cm = {group: tuple(row) for group, row in zip(self.groups, self._cm_table.tolist())}
     
     def _get_confusion_matrix(self, group):
-        """Calculate confusion matrix for a specific group"""
-        group_data = self._get_group_data(group)
-        if len(group_data) == 0:
-            return 0, 0, 0, 0
-        
-        tn, fp, fn, tp = confusion_matrix(
-            group_data['shortlisted'],
-            group_data['predicted_shortlist'],
-            labels=[0, 1]
-        ).ravel()
-        return tn, fp, fn, tp
+        """Get cached confusion matrix (tn, fp, fn, tp) for a specific group"""
+        return self._cm[group]
     
-    def demographic_parity(self) -> Dict[str, Any]:
-        """Calculate demographic parity - shortlisting rates by group"""
-        results = {}
-        for group in self.groups:
-            group_data = self._get_group_data(group)
-            rate = group_data['shortlisted'].mean()
-            results[str(group)] = float(rate)
-        
-        # Calculate fairness assessment
-        rates = list(results.values())
-        max_diff = max(rates) - min(rates)
-        assessment = "Fair" if max_diff < 0.1 else "Warning" if max_diff < 0.2 else "Violation"
+    def _bar_result(self, values: np.ndarray) -> Dict[str, Any]:
+        """Build a bar-chart result from per-group values, assessed on the max-min difference"""
+        results = dict(zip(self._group_names, values.tolist()))
+        # Groups without a value (e.g. missing protected values) are left out of the spread
+        finite = values[~np.isnan(values)]
+        if values.size and not finite.size:
+            return {
+                'values': results,
+                'visualization_type': 'bar',
+                'fairness_assessment': 'Insufficient data',
+                'max_difference': 0.0
+            }
+        max_diff = (finite.max() - finite.min()).item() if finite.size else 0.0
+        assessment = ASSESSMENT_LEVELS[int(max_diff >= 0.1) + int(max_diff >= 0.2)]
         
         return {
             'values': results,
             'visualization_type': 'bar',
             'fairness_assessment': assessment,
-            'max_difference': float(max_diff)
+            'max_difference': max_diff
         }
     
+    @memoized_metric
+    def demographic_parity(self) -> Dict[str, Any]:
+        """Calculate demographic parity - shortlisting rates by group"""
+        return self._bar_result(self._group_rates)
+    
+    @memoized_metric
     def disparate_impact(self) -> Dict[str, Any]:
         """Calculate disparate impact ratio (80% rule)"""
-        rates = {}
-        for group in self.groups:
-            group_data = self._get_group_data(group)
-            rates[str(group)] = float(group_data['shortlisted'].mean())
+        rates = dict(zip(self._group_names, self._group_rates.tolist()))
         
-        if len(rates) < 2:
+        if len(self._group_rates) < 2:
             return {'values': rates, 'fairness_assessment': 'Insufficient data'}
         
-        # Calculate ratios relative to highest rate
-        max_rate = max(rates.values())
-        ratios = {group: float(rate / max_rate if max_rate > 0 else 0) for group, rate in rates.items()}
+        # Calculate ratios relative to highest rate, ignoring groups without a rate
+        # (e.g. missing protected values)
+        finite = ~np.isnan(self._group_rates)
+        if not finite.any():
+            return {'values': rates, 'fairness_assessment': 'Insufficient data'}
+        max_rate = self._group_rates[finite].max()
+        ratio_values = self._group_rates / max_rate if max_rate > 0 else np.where(finite, 0.0, np.nan)
+        ratios = dict(zip(self._group_names, ratio_values.tolist()))
         
         # 80% rule: ratios should be >= 0.8
-        min_ratio = min(ratios.values())
+        min_ratio = ratio_values[finite].min().item()
         assessment = "Fair" if min_ratio >= 0.8 else "Violation"
         
         return {
@@ -79,61 +152,35 @@ class FairnessMetrics:
             'rates': rates,
             'visualization_type': 'bar',
             'fairness_assessment': assessment,
-            'min_ratio': float(min_ratio),
+            'min_ratio': min_ratio,
             'threshold': 0.8
         }
     
+    @memoized_metric
     def equal_opportunity(self) -> Dict[str, Any]:
         """Calculate True Positive Rate equality - ONLY for qualified candidates (screening_score >= threshold)"""
-        results = {}
+        values = np.zeros(len(self.groups))
         
         if self.threshold is not None and 'screening_score' in self.df.columns:
-            # Filter to qualified candidates only (like Streamlit)
-            qualified = self.df[self.df['screening_score'] >= self.threshold]
-            for group in self.groups:
-                group_data = qualified[qualified[self.protected_attr] == group]
-                if len(group_data) > 0:
-                    rate = group_data['shortlisted'].mean()
-                    results[str(group)] = float(rate)
-                else:
-                    results[str(group)] = 0.0
+            # Restrict to qualified candidates only (like Streamlit); groups with none stay 0.0
+            for i, group in enumerate(self.groups):
+                qualified_y = self._y_by_group[group][self._qualified_mask[self._group_idx[group]]]
+                if len(qualified_y) > 0:
+                    values[i] = qualified_y.mean(dtype=np.float64)
         else:
             # Fallback: use TPR from confusion matrix
-            for group in self.groups:
-                tn, fp, fn, tp = self._get_confusion_matrix(group)
-                tpr = tp / (tp + fn + 1e-6)
-                results[str(group)] = float(tpr)
-        
-        values = list(results.values())
-        max_diff = max(values) - min(values) if values else 0
-        assessment = "Fair" if max_diff < 0.1 else "Warning" if max_diff < 0.2 else "Violation"
+            tn, fp, fn, tp = self._cm_table.T
+            values = tp / (tp + fn + 1e-6)
         
-        return {
-            'values': results,
-            'visualization_type': 'bar',
-            'fairness_assessment': assessment,
-            'max_difference': float(max_diff)
-        }
+        return self._bar_result(values)
     
+    @memoized_metric
     def predictive_equality(self) -> Dict[str, Any]:
         """Calculate False Positive Rate equality"""
-        results = {}
-        for group in self.groups:
-            tn, fp, fn, tp = self._get_confusion_matrix(group)
-            fpr = fp / (fp + tn + 1e-6)
-            results[str(group)] = float(fpr)
-        
-        values = list(results.values())
-        max_diff = max(values) - min(values) if values else 0
-        assessment = "Fair" if max_diff < 0.1 else "Warning" if max_diff < 0.2 else "Violation"
-        
-        return {
-            'values': results,
-            'visualization_type': 'bar',
-            'fairness_assessment': assessment,
-            'max_difference': float(max_diff)
-        }
+        tn, fp, fn, tp = self._cm_table.T
+        return self._bar_result(fp / (fp + tn + 1e-6))
     
+    @memoized_metric
     def calibration_by_group(self) -> Dict[str, Any]:
         """Calculate calibration across score bins using quantile binning"""
         if 'screening_score' not in self.df.columns:
@@ -141,24 +188,20 @@ class FairnessMetrics:
         
         try:
             # Use quantile binning (like Streamlit qcut)
-            self.df['score_bin'] = pd.qcut(self.df['screening_score'], q=10, duplicates='drop')
+            score_bins = pd.qcut(self.df['screening_score'], q=10, duplicates='drop')
             
-            calibration_data = {}
-            bin_labels = sorted(self.df['score_bin'].unique())
+            bin_labels = sorted(score_bins.unique())
             
-            for group in self.groups:
-                group_data = self._get_group_data(group)
-                group_calibration = []
-                
-                for bin_val in bin_labels:
-                    bin_data = group_data[group_data['score_bin'] == bin_val]
-                    if len(bin_data) > 0:
-                        actual_rate = bin_data['shortlisted'].mean()
-                        group_calibration.append(float(actual_rate))
-                    else:
-                        group_calibration.append(0.0)
-                
-                calibration_data[str(group)] = group_calibration
+            # Single groupby pivot of shortlisting rate per (group, bin); empty cells are 0.0
+            table = self.df['shortlisted'].groupby(
+                [self.df[self.protected_attr], score_bins], observed=True
+            ).mean().unstack(fill_value=0.0)
+            table = table.reindex(index=self.groups, columns=bin_labels, fill_value=0.0)
+            
+            calibration_data = {
+                name: row.tolist()
+                for name, row in zip(self._group_names, table.to_numpy())
+            }
             
             return {
                 'values': calibration_data,
@@ -172,100 +215,45 @@ class FairnessMetrics:
                 'fairness_assessment': f'Error: {str(e)}'
             }
     
+    @memoized_metric
     def false_negative_rate_parity(self) -> Dict[str, Any]:
         """Calculate False Negative Rate parity"""
-        results = {}
-        for group in self.groups:
-            tn, fp, fn, tp = self._get_confusion_matrix(group)
-            fnr = fn / (fn + tp + 1e-6)
-            results[str(group)] = float(fnr)
-        
-        values = list(results.values())
-        max_diff = max(values) - min(values) if values else 0
-        assessment = "Fair" if max_diff < 0.1 else "Warning" if max_diff < 0.2 else "Violation"
-        
-        return {
-            'values': results,
-            'visualization_type': 'bar',
-            'fairness_assessment': assessment,
-            'max_difference': float(max_diff)
-        }
+        tn, fp, fn, tp = self._cm_table.T
+        return self._bar_result(fn / (fn + tp + 1e-6))
     
+    @memoized_metric
     def false_discovery_rate_parity(self) -> Dict[str, Any]:
         """Calculate False Discovery Rate parity"""
-        results = {}
-        for group in self.groups:
-            tn, fp, fn, tp = self._get_confusion_matrix(group)
-            fdr = fp / (fp + tp + 1e-6)
-            results[str(group)] = float(fdr)
-        
-        values = list(results.values())
-        max_diff = max(values) - min(values) if values else 0
-        assessment = "Fair" if max_diff < 0.1 else "Warning" if max_diff < 0.2 else "Violation"
-        
-        return {
-            'values': results,
-            'visualization_type': 'bar',
-            'fairness_assessment': assessment,
-            'max_difference': float(max_diff)
-        }
+        tn, fp, fn, tp = self._cm_table.T
+        return self._bar_result(fp / (fp + tp + 1e-6))
     
+    @memoized_metric
     def accuracy_equality(self) -> Dict[str, Any]:
         """Calculate accuracy equality across groups"""
-        results = {}
-        for group in self.groups:
-            tn, fp, fn, tp = self._get_confusion_matrix(group)
-            accuracy = (tp + tn) / (tp + tn + fp + fn + 1e-6)
-            results[str(group)] = float(accuracy)
-        
-        values = list(results.values())
-        max_diff = max(values) - min(values) if values else 0
-        assessment = "Fair" if max_diff < 0.1 else "Warning" if max_diff < 0.2 else "Violation"
-        
-        return {
-            'values': results,
-            'visualization_type': 'bar',
-            'fairness_assessment': assessment,
-            'max_difference': float(max_diff)
-        }
+        tn, fp, fn, tp = self._cm_table.T
+        return self._bar_result((tp + tn) / (tp + tn + fp + fn + 1e-6))
     
+    @memoized_metric
     def predictive_parity_ppv(self) -> Dict[str, Any]:
         """Calculate Positive Predictive Value parity"""
-        results = {}
-        for group in self.groups:
-            tn, fp, fn, tp = self._get_confusion_matrix(group)
-            ppv = tp / (tp + fp + 1e-6)
-            results[str(group)] = float(ppv)
-        
-        values = list(results.values())
-        max_diff = max(values) - min(values) if values else 0
-        assessment = "Fair" if max_diff < 0.1 else "Warning" if max_diff < 0.2 else "Violation"
-        
-        return {
-            'values': results,
-            'visualization_type': 'bar',
-            'fairness_assessment': assessment,
-            'max_difference': float(max_diff)
-        }
+        tn, fp, fn, tp = self._cm_table.T
+        return self._bar_result(tp / (tp + fp + 1e-6))
     
+    @memoized_metric
     def equalized_odds(self) -> Dict[str, Any]:
         """Calculate equalized odds (TPR and FPR together)"""
-        results = {}
-        for group in self.groups:
-            tn, fp, fn, tp = self._get_confusion_matrix(group)
-            tpr = tp / (tp + fn + 1e-6)
-            fpr = fp / (fp + tn + 1e-6)
-            results[str(group)] = {
-                'tpr': float(tpr),
-                'fpr': float(fpr)
-            }
+        tn, fp, fn, tp = self._cm_table.T
+        tpr_values = tp / (tp + fn + 1e-6)
+        fpr_values = fp / (fp + tn + 1e-6)
         
-        # Check if both TPR and FPR are similar across groups
-        tpr_values = [v['tpr'] for v in results.values()]
-        fpr_values = [v['fpr'] for v in results.values()]
+        results = {
+            name: {'tpr': tpr, 'fpr': fpr}
+            for name, tpr, fpr in zip(self._group_names, tpr_values.tolist(), fpr_values.tolist())
+        }
         
-        tpr_diff = max(tpr_values) - min(tpr_values) if tpr_values else 0
-        fpr_diff = max(fpr_values) - min(fpr_values) if fpr_values else 0
+        # Check if both TPR and FPR are similar across groups
+        tpr_diff = np.ptp(tpr_values).item() if tpr_values.size else 0.0
+        fpr_diff = np.ptp(fpr_values).item() if fpr_values.size else 0.0
         
         max_diff = max(tpr_diff, fpr_diff)
         assessment = "Fair" if max_diff < 0.1 else "Warning" if max_diff < 0.2 else "Violation"
@@ -274,32 +262,28 @@ class FairnessMetrics:
             'values': results,
             'visualization_type': 'scatter',
             'fairness_assessment': assessment,
-            'tpr_difference': float(tpr_diff),
-            'fpr_difference': float(fpr_diff)
+            'tpr_difference': tpr_diff,
+            'fpr_difference': fpr_diff
         }
     
+    @memoized_metric
     def statistical_parity_difference(self) -> Dict[str, Any]:
         """Calculate statistical parity difference"""
-        rates = []
-        for group in self.groups:
-            group_data = self._get_group_data(group)
-            rate = group_data['shortlisted'].mean()
-            rates.append(rate)
-        
-        if len(rates) >= 2:
-            spd = rates[0] - rates[1]
+        if len(self._group_rates) >= 2:
+            spd = (self._group_rates[0] - self._group_rates[1]).item()
         else:
-            spd = 0
+            spd = 0.0
         
         assessment = "Fair" if abs(spd) < 0.1 else "Warning" if abs(spd) < 0.2 else "Violation"
         
         return {
-            'value': float(spd),
+            'value': spd,
             'visualization_type': 'metric',
             'fairness_assessment': assessment,
             'interpretation': 'Values close to 0 indicate fairness'
         }
     
+    @memoized_metric
     def average_odds_difference(self) -> Dict[str, Any]:
         """Calculate average odds difference"""
         if len(self.groups) < 2:
@@ -333,20 +317,21 @@ class FairnessMetrics:
             'interpretation': 'Values close to 0 indicate fairness'
         }
     
+    @memoized_metric
     def theil_index(self) -> Dict[str, Any]:
         """Calculate Theil index - measures inequality (Streamlit formula)"""
-        p = self.df['shortlisted']
+        p = self._y
         mean = p.mean()
         
         if mean == 0:
             theil = 0.0
         else:
-            theil = np.mean((p / mean) * np.log((p + 1e-6) / mean))
+            theil = np.mean((p / mean) * np.log((p + 1e-6) / mean)).item()
         
         assessment = "Fair" if abs(theil) < 0.1 else "Warning" if abs(theil) < 0.2 else "Violation"
         
         return {
-            'value': float(theil),
+            'value': theil,
             'visualization_type': 'metric',
             'fairness_assessment': assessment,
             'interpretation': 'Values close to 0 indicate fairness'
@@ -1,10 +1,18 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, status
+from fastapi import FastAPI, BackgroundTasks, File, UploadFile, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+import numpy as np
 import pandas as pd
 import os
-import json
+import asyncio
+import threading
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from types import MappingProxyType
 from typing import Optional, List
 from dotenv import load_dotenv
 
@@ -14,11 +22,11 @@ from models import (
     ComparisonResponse, MetricDefinition
 )
 from fairness_metrics import FairnessMetrics
-from metric_definitions import get_metric_definition, get_all_metrics
+from metric_definitions import get_all_metrics, METRICS_LIST_JSON
 from assessment_classifier import classify_assessment, get_value_segment_info
 from utils import (
-    process_uploaded_dataset, get_dataset_statistics,
-    validate_protected_attribute, prepare_dataframe_for_json
+    parse_upload, process_uploaded_dataset, get_dataset_statistics,
+    validate_protected_attribute, prepare_dataframe_for_json, dataset_to_table, write_dataset
 )
 
 # Load environment variables
@@ -28,7 +36,8 @@ load_dotenv()
 app = FastAPI(
     title="AI Fairness Audit API",
     description="Backend API for AI Fairness Audit Dashboard",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration
@@ -41,12 +50,200 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+async def unhandled_error_handler(request: Request, exc: Exception) -> ORJSONResponse:
+    """Report an unexpected error as a 500 carrying its message"""
+    return ORJSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"detail": str(exc)}
+    )
+
+# ValueError (dataset validation) is registered on its own so the response still passes
+# through CORSMiddleware; the catch-all Exception handler runs outside all middleware
+app.add_exception_handler(ValueError, unhandled_error_handler)
+app.add_exception_handler(Exception, unhandled_error_handler)
+
 # Storage configuration
 UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "./uploads"))
 UPLOAD_DIR.mkdir(exist_ok=True)
 
-# In-memory storage for dataset metadata (in production, use a database)
-datasets = {}
+def get_dataset_path(dataset_id: str) -> Path:
+    """Stored dataset file: Parquet, falling back to CSV for datasets saved by older versions"""
+    parquet_path = UPLOAD_DIR / f"{dataset_id}.parquet"
+    if parquet_path.exists():
+        return parquet_path
+    return UPLOAD_DIR / f"{dataset_id}.csv"
+
+def read_dataset(dataset_path: Path) -> pd.DataFrame:
+    """Load a stored dataset file"""
+    if dataset_path.suffix == '.parquet':
+        # Memory-map the file so Arrow reads straight from the page cache
+        return pq.read_table(dataset_path, memory_map=True).to_pandas()
+    return pd.read_csv(dataset_path)
+
+def read_metadata(metadata_path: Path) -> dict:
+    """Load a stored dataset's metadata JSON"""
+    return orjson.loads(metadata_path.read_bytes())
+
+# In-memory storage for loaded datasets (in production, use a database).
+# Bounded LRU: evicted datasets stay on disk and are reloaded on next access.
+DATASET_CACHE_SIZE = int(os.getenv("DATASET_CACHE", 16))
+datasets = OrderedDict()
+
+def cache_dataset(dataset_id: str, df: pd.DataFrame, metadata: dict):
+    """Store a dataset in memory, evicting the least recently used one when full"""
+    datasets[dataset_id] = {'df': df, 'metadata': metadata}
+    datasets.move_to_end(dataset_id)
+    if len(datasets) > DATASET_CACHE_SIZE:
+        evicted_id, _ = datasets.popitem(last=False)
+        # Its fairness calculators hold the DataFrame, so drop them too
+        invalidate_fairness(evicted_id)
+
+def get_dataset_in_memory(dataset_id: str) -> Optional[dict]:
+    """Get a dataset's df and metadata, loading it from disk on a miss. None if it doesn't exist"""
+    if dataset_id in datasets:
+        datasets.move_to_end(dataset_id)
+        return datasets[dataset_id]
+    
+    dataset_path = get_dataset_path(dataset_id)
+    metadata_path = UPLOAD_DIR / f"{dataset_id}_metadata.json"
+    if not dataset_path.exists() or not metadata_path.exists():
+        return None
+    
+    df = read_dataset(dataset_path)
+    metadata = read_metadata(metadata_path)
+    cache_dataset(dataset_id, df, metadata)
+    return datasets[dataset_id]
+
+# Fairness calculators per (dataset_id, protected_attr), least recently used evicted first.
+# Each instance memoizes its metric results, so repeated per-metric requests reuse them.
+FAIRNESS_CACHE_SIZE = 32
+fairness_cache = OrderedDict()
+fairness_cache_lock = threading.Lock()
+
+def get_fairness(dataset_id: str, df: pd.DataFrame, protected_attr: str) -> FairnessMetrics:
+    """Get the cached FairnessMetrics for a dataset, building it from the given df on a miss"""
+    key = (dataset_id, protected_attr)
+    with fairness_cache_lock:
+        if key in fairness_cache:
+            fairness_cache.move_to_end(key)
+            return fairness_cache[key]
+    
+    fairness = FairnessMetrics(df, protected_attr)
+    with fairness_cache_lock:
+        fairness_cache[key] = fairness
+        if len(fairness_cache) > FAIRNESS_CACHE_SIZE:
+            fairness_cache.popitem(last=False)
+    return fairness
+
+def invalidate_fairness(dataset_id: str):
+    """Drop cached fairness calculators for a dataset"""
+    with fairness_cache_lock:
+        for key in [key for key in fairness_cache if key[0] == dataset_id]:
+            del fairness_cache[key]
+
+# Worker pool for running independent metric calculations concurrently
+METRIC_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+def calculate_metric_safely(method, metric_name: str) -> dict:
+    """Run a metric method, returning an error placeholder instead of raising"""
+    try:
+        return method()
+    except Exception as e:
+        # Log and continue — create an error placeholder for this metric
+        print(f"Error calculating metric {metric_name}: {e}")
+        return {
+            'values': {},
+            'visualization_type': 'metric',
+            'fairness_assessment': 'Error',
+            'error': str(e)
+        }
+
+def _json_default(value):
+    """Encode NumPy scalars and read-only mappings that orjson doesn't handle natively"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, MappingProxyType):
+        return dict(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def model_response(model) -> Response:
+    """
+    Encode a response dataclass straight to JSON with orjson, skipping FastAPI's
+    validation and jsonable_encoder pass (NumPy values are encoded directly)
+    """
+    return Response(
+        content=orjson.dumps(
+            model,
+            default=_json_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        ),
+        media_type="application/json"
+    )
+
+# Static metric definitions, resolved once at import
+ALL_METRICS = get_all_metrics()
+
+# Names accepted for single-metric analysis
+METRIC_METHOD_SET = frozenset(FairnessMetrics.METRIC_METHODS)
+
+# Metrics assessed by the max difference between per-group values
+GROUP_DIFFERENCE_METRICS = frozenset([
+    'demographic_parity', 'equal_opportunity', 'predictive_equality',
+    'false_negative_rate_parity', 'false_discovery_rate_parity',
+    'accuracy_equality', 'predictive_parity_ppv', 'calibration_by_group'
+])
+
+def _numeric_array(values: dict) -> np.ndarray:
+    """Numeric per-group values as a float64 array, without groups that have no value (NaN)"""
+    arr = np.fromiter(
+        (v for v in values.values() if isinstance(v, (int, float))), dtype=np.float64
+    )
+    return arr[~np.isnan(arr)]
+
+def _ptp(arr: np.ndarray) -> float:
+    """Max - min of an array, 0.0 when it has fewer than two values"""
+    return np.ptp(arr).item() if arr.size > 1 else 0.0
+
+def _scalar_or(values, default: float) -> float:
+    """Float of a single value metric result, or the default for anything else"""
+    return float(values) if isinstance(values, (int, float)) else default
+
+def _min_ratio(values) -> float:
+    """DI: minimum ratio across groups"""
+    if isinstance(values, dict):
+        arr = _numeric_array(values)
+        return arr.min().item() if arr.size else 1.0
+    return _scalar_or(values, 1.0)
+
+def _max_difference(values) -> float:
+    """Max difference between per-group values"""
+    if isinstance(values, dict):
+        return _ptp(_numeric_array(values))
+    return abs(_scalar_or(values, 0.0))
+
+def _odds_difference(values) -> float:
+    """Equalized odds: larger of the TPR and FPR differences"""
+    if isinstance(values, dict):
+        rates = [v for v in values.values() if isinstance(v, dict)]
+        tpr = np.fromiter((v['tpr'] for v in rates if 'tpr' in v), dtype=np.float64)
+        fpr = np.fromiter((v['fpr'] for v in rates if 'fpr' in v), dtype=np.float64)
+        return max(_ptp(tpr), _ptp(fpr))
+    return abs(_scalar_or(values, 0.0))
+
+def _absolute_value(values) -> float:
+    """Single value metrics (SPD, AOD, Theil): absolute value"""
+    return abs(_scalar_or(values, 0.0))
+
+# Assessment value extractor per metric, resolved once at import
+ASSESS_FN = {
+    metric_name: (
+        _min_ratio if metric_name == 'disparate_impact'
+        else _max_difference if metric_name in GROUP_DIFFERENCE_METRICS
+        else _odds_difference if metric_name == 'equalized_odds'
+        else _absolute_value
+    )
+    for metric_name in ALL_METRICS
+}
 
 @app.get("/")
 async def root():
@@ -63,119 +260,109 @@ async def root():
         }
     }
 
+async def persist_dataset(dataset_id: str, table: pa.Table, metadata: dict):
+    """Write an uploaded dataset to disk, forgetting it if that fails so later requests get a 404"""
+    dataset_path = UPLOAD_DIR / f"{dataset_id}.parquet"
+    metadata_path = UPLOAD_DIR / f"{dataset_id}_metadata.json"
+    try:
+        await asyncio.get_running_loop().run_in_executor(
+            None, write_dataset, dataset_path, table, metadata_path, metadata
+        )
+    except Exception as e:
+        print(f"Error saving dataset {dataset_id}: {e}")
+        datasets.pop(dataset_id, None)
+        invalidate_fairness(dataset_id)
+        for path in (dataset_path, metadata_path):
+            path.unlink(missing_ok=True)
+
 @app.post("/api/upload", response_model=DatasetUploadResponse)
-async def upload_dataset(file: UploadFile = File(...)):
+async def upload_dataset(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """
     Upload a CSV dataset for analysis
     Returns dataset ID and metadata
     """
-    try:
-        # Validate file type
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Only CSV files are supported"
-            )
-        
-        # Read CSV file
-        contents = await file.read()
-        
-        # Check file size (max 10MB)
-        max_size = int(os.getenv("MAX_FILE_SIZE", 10485760))
-        if len(contents) > max_size:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File size exceeds {max_size} bytes"
-            )
-        
-        # Parse CSV
-        try:
-            df = pd.read_csv(pd.io.common.BytesIO(contents))
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Error parsing CSV: {str(e)}"
-            )
-        
-        # Process dataset
-        df, metadata = process_uploaded_dataset(df, file.filename)
-        
-        # Save dataset
-        dataset_id = metadata['dataset_id']
-        dataset_path = UPLOAD_DIR / f"{dataset_id}.csv"
-        df.to_csv(dataset_path, index=False)
-        
-        # Save metadata
-        metadata_path = UPLOAD_DIR / f"{dataset_id}_metadata.json"
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f)
-        
-        # Store in memory
-        datasets[dataset_id] = {
-            'df': df,
-            'metadata': metadata
-        }
-        
-        return DatasetUploadResponse(**metadata)
+    # Validate file type
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only CSV files are supported"
+        )
     
-    except HTTPException:
-        raise
+    # Check file size (max 10MB). Starlette has already spooled the upload, so its
+    # size is known without reading the contents
+    max_size = int(os.getenv("MAX_FILE_SIZE", 10485760))
+    size = file.size
+    if size is None:
+        size = file.file.seek(0, os.SEEK_END)
+    if size > max_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File size exceeds {max_size} bytes"
+        )
+    
+    # Parse CSV straight from the spooled upload file, without copying it into memory
+    file.file.seek(0)
+    try:
+        df = parse_upload(file.file)
     except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing upload: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error parsing CSV: {str(e)}"
         )
+    
+    # Process dataset
+    df, metadata = process_uploaded_dataset(df, file.filename)
+    
+    # Convert to the stored Arrow table now, so a dataset that can't be saved is
+    # rejected here rather than failing after the response
+    try:
+        table = dataset_to_table(df)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Dataset cannot be stored: {str(e)}"
+        )
+    
+    # Store in memory
+    dataset_id = metadata['dataset_id']
+    cache_dataset(dataset_id, df, metadata)
+    
+    # Save dataset and metadata after the response is sent; the in-memory copy
+    # serves requests until then
+    background_tasks.add_task(persist_dataset, dataset_id, table, metadata)
+    
+    return DatasetUploadResponse(**metadata)
 
 @app.get("/api/dataset/{dataset_id}", response_model=DatasetPreview)
 async def get_dataset(dataset_id: str, rows: Optional[int] = 100):
     """
     Get dataset preview and statistics
     """
-    try:
-        # Check if dataset exists
-        if dataset_id not in datasets:
-            # Try to load from disk
-            dataset_path = UPLOAD_DIR / f"{dataset_id}.csv"
-            metadata_path = UPLOAD_DIR / f"{dataset_id}_metadata.json"
-            
-            if not dataset_path.exists() or not metadata_path.exists():
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Dataset not found"
-                )
-            
-            # Load dataset
-            df = pd.read_csv(dataset_path)
-            with open(metadata_path, 'r') as f:
-                metadata = json.load(f)
-            
-            datasets[dataset_id] = {'df': df, 'metadata': metadata}
-        
-        df = datasets[dataset_id]['df']
-        metadata = datasets[dataset_id]['metadata']
-        
-        # Get statistics
-        statistics = get_dataset_statistics(df)
-        
-        # Prepare preview data
-        preview_data = prepare_dataframe_for_json(df, max_rows=rows)
-        
-        return DatasetPreview(
-            dataset_id=dataset_id,
-            filename=metadata['filename'],
-            rows=metadata['rows'],
-            columns=metadata['columns'],
-            data=preview_data,
-            statistics=statistics
-        )
-    
-    except HTTPException:
-        raise
-    except Exception as e:
+    # Check if dataset exists (loading from disk if needed)
+    dataset = get_dataset_in_memory(dataset_id)
+    if dataset is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error retrieving dataset: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dataset not found"
         )
+    
+    df = dataset['df']
+    metadata = dataset['metadata']
+    
+    # Get statistics
+    statistics = get_dataset_statistics(df)
+    
+    # Prepare preview data
+    preview_data = prepare_dataframe_for_json(df, max_rows=rows)
+    
+    return DatasetPreview(
+        dataset_id=dataset_id,
+        filename=metadata['filename'],
+        rows=metadata['rows'],
+        columns=metadata['columns'],
+        data=preview_data,
+        statistics=statistics
+    )
 
 @app.post("/api/analyze", response_model=AnalysisResponse)
 async def analyze_dataset(request: AnalysisRequest):
@@ -184,373 +371,239 @@ async def analyze_dataset(request: AnalysisRequest):
     If metric_name is provided, calculate only that metric
     Otherwise, calculate all metrics
     """
-    try:
-        # Load dataset
-        if request.dataset_id not in datasets:
-            dataset_path = UPLOAD_DIR / f"{request.dataset_id}.csv"
-            if not dataset_path.exists():
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Dataset not found"
-                )
-            df = pd.read_csv(dataset_path)
-            metadata_path = UPLOAD_DIR / f"{request.dataset_id}_metadata.json"
-            with open(metadata_path, 'r') as f:
-                metadata = json.load(f)
-            datasets[request.dataset_id] = {'df': df, 'metadata': metadata}
-        
-        df = datasets[request.dataset_id]['df']
+    # Load dataset
+    dataset = get_dataset_in_memory(request.dataset_id)
+    if dataset is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dataset not found"
+        )
+    
+    df = dataset['df']
 
-        # Validate dataset has required columns and protected attribute
-        try:
-            if 'shortlisted' not in df.columns:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Dataset is missing required column 'shortlisted'"
-                )
-
-            # validate_protected_attribute raises ValueError on invalid attr
-            validate_protected_attribute(df, request.protected_attr)
-        except ValueError as ve:
+    # Validate dataset has required columns and protected attribute
+    try:
+        if 'shortlisted' not in df.columns:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=str(ve)
+                detail="Dataset is missing required column 'shortlisted'"
             )
 
-        # Initialize fairness metrics calculator
-        try:
-            fairness = FairnessMetrics(df, request.protected_attr)
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error preparing dataset for fairness calculations: {str(e)}"
-            )
+        # validate_protected_attribute raises ValueError on invalid attr
+        validate_protected_attribute(
+            df, request.protected_attr, dataset['metadata'].get('column_summary')
+        )
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
+
+    # Initialize fairness metrics calculator
+    try:
+        fairness = get_fairness(request.dataset_id, df, request.protected_attr)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error preparing dataset for fairness calculations: {str(e)}"
+        )
+    
+    # Calculate metrics concurrently (guard each metric to avoid full analysis failure)
+    if request.metric_name:
+        metrics_to_calculate = [request.metric_name] if request.metric_name in METRIC_METHOD_SET else []
+    else:
+        metrics_to_calculate = FairnessMetrics.METRIC_METHODS
+    loop = asyncio.get_running_loop()
+    metric_results = await asyncio.gather(*[
+        loop.run_in_executor(METRIC_EXECUTOR, calculate_metric_safely, getattr(fairness, name), name)
+        for name in metrics_to_calculate
+    ])
+    results = []
+    
+    for metric_name, metric_result in zip(metrics_to_calculate, metric_results):
+        # Get definition
+        definition = ALL_METRICS[metric_name]
         
-        # Define all metric methods
-        metric_methods = {
-            'demographic_parity': fairness.demographic_parity,
-            'disparate_impact': fairness.disparate_impact,
-            'equal_opportunity': fairness.equal_opportunity,
-            'predictive_equality': fairness.predictive_equality,
-            'calibration_by_group': fairness.calibration_by_group,
-            'false_negative_rate_parity': fairness.false_negative_rate_parity,
-            'false_discovery_rate_parity': fairness.false_discovery_rate_parity,
-            'accuracy_equality': fairness.accuracy_equality,
-            'predictive_parity_ppv': fairness.predictive_parity_ppv,
-            'equalized_odds': fairness.equalized_odds,
-            'statistical_parity_difference': fairness.statistical_parity_difference,
-            'average_odds_difference': fairness.average_odds_difference,
-            'theil_index': fairness.theil_index
-        }
+        # Extract the primary value for classification
+        values = metric_result.get('values', metric_result.get('value', {}))
         
-        # Calculate metrics
-        metrics_to_calculate = [request.metric_name] if request.metric_name else list(metric_methods.keys())
-        results = []
+        # Determine the assessment value based on metric type
+        assessment_value = ASSESS_FN[metric_name](values)
         
-        for metric_name in metrics_to_calculate:
-            if metric_name not in metric_methods:
-                continue
-
-            # Calculate metric (guard each metric to avoid full analysis failure)
-            try:
-                metric_result = metric_methods[metric_name]()
-            except Exception as e:
-                # Log and continue — create an error placeholder for this metric
-                print(f"Error calculating metric {metric_name}: {e}")
-                metric_result = {
-                    'values': {},
-                    'visualization_type': 'metric',
-                    'fairness_assessment': 'Error',
-                    'error': str(e)
-                }
-            
-            # Get definition
-            definition = get_metric_definition(metric_name)
-            
-            # Extract the primary value for classification
-            values = metric_result.get('values', metric_result.get('value', {}))
-            
-            # Determine the assessment value based on metric type
-            if metric_name == 'disparate_impact':
-                # For DI, use the minimum ratio
-                if isinstance(values, dict):
-                    numeric_values = [v for v in values.values() if isinstance(v, (int, float))]
-                    assessment_value = min(numeric_values) if numeric_values else 1.0
-                else:
-                    assessment_value = float(values) if isinstance(values, (int, float)) else 1.0
-            elif metric_name in ['demographic_parity', 'equal_opportunity', 'predictive_equality', 
-                                  'false_negative_rate_parity', 'false_discovery_rate_parity',
-                                  'accuracy_equality', 'predictive_parity_ppv', 'calibration_by_group']:
-                # For these, calculate max difference between groups
-                if isinstance(values, dict):
-                    numeric_values = [v for v in values.values() if isinstance(v, (int, float))]
-                    assessment_value = max(numeric_values) - min(numeric_values) if numeric_values else 0.0
-                else:
-                    assessment_value = abs(float(values)) if isinstance(values, (int, float)) else 0.0
-            elif metric_name == 'equalized_odds':
-                # For equalized odds, get max of TPR and FPR differences
-                if isinstance(values, dict):
-                    tpr_values = [v.get('tpr', 0) for v in values.values() if isinstance(v, dict) and 'tpr' in v]
-                    fpr_values = [v.get('fpr', 0) for v in values.values() if isinstance(v, dict) and 'fpr' in v]
-                    tpr_diff = max(tpr_values) - min(tpr_values) if len(tpr_values) > 1 else 0
-                    fpr_diff = max(fpr_values) - min(fpr_values) if len(fpr_values) > 1 else 0
-                    assessment_value = max(tpr_diff, fpr_diff)
-                else:
-                    assessment_value = abs(float(values)) if isinstance(values, (int, float)) else 0.0
-            else:
-                # For single value metrics (SPD, AOD, Theil)
-                assessment_value = abs(float(values)) if isinstance(values, (int, float)) else 0.0
-            
-            # Classify assessment using value segments
-            fairness_assessment = classify_assessment(metric_name, assessment_value)
-            
-            # Get value segment information
-            segment_info = get_value_segment_info(metric_name, assessment_value)
-            
-            # Add segment info to definition
-            definition_with_segment = {**definition, 'current_segment': segment_info}
-            
-            # Create result
-            result = MetricResult(
-                metric_name=metric_name,
-                values=values,
-                visualization_data=metric_result,
-                fairness_assessment=fairness_assessment,
-                explanation=definition_with_segment
-            )
-            results.append(result)
+        # Classify assessment using value segments
+        fairness_assessment = classify_assessment(metric_name, assessment_value)
         
-        # Create summary
-        fair_count = sum(1 for r in results if r.fairness_assessment == "Fair")
-        warning_count = sum(1 for r in results if r.fairness_assessment == "Warning")
-        violation_count = sum(1 for r in results if r.fairness_assessment == "Violation")
+        # Get value segment information
+        segment_info = get_value_segment_info(metric_name, assessment_value)
         
-        summary = {
-            'total_metrics': len(results),
-            'fair': fair_count,
-            'warning': warning_count,
-            'violation': violation_count,
-            'overall_assessment': 'Fair' if violation_count == 0 and warning_count == 0 else 'Needs Attention'
-        }
+        # Add segment info to definition
+        definition_with_segment = {**definition, 'current_segment': segment_info}
         
-        return AnalysisResponse(
-            dataset_id=request.dataset_id,
-            protected_attr=request.protected_attr,
-            metrics=results,
-            summary=summary
+        # Create result
+        result = MetricResult(
+            metric_name=metric_name,
+            values=values,
+            visualization_data=metric_result,
+            fairness_assessment=fairness_assessment,
+            explanation=definition_with_segment
         )
+        results.append(result)
     
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error analyzing dataset: {str(e)}"
-        )
+    # Create summary
+    assessment_counts = Counter(r.fairness_assessment for r in results)
+    fair_count = assessment_counts["Fair"]
+    warning_count = assessment_counts["Warning"]
+    violation_count = assessment_counts["Violation"]
+    
+    summary = {
+        'total_metrics': len(results),
+        'fair': fair_count,
+        'warning': warning_count,
+        'violation': violation_count,
+        'overall_assessment': 'Fair' if violation_count == 0 and warning_count == 0 else 'Needs Attention'
+    }
+    
+    return model_response(AnalysisResponse(
+        dataset_id=request.dataset_id,
+        protected_attr=request.protected_attr,
+        metrics=results,
+        summary=summary
+    ))
 
 @app.post("/api/compare", response_model=ComparisonResponse)
 async def compare_datasets(request: ComparisonRequest):
     """
     Compare fairness metrics between two datasets
     """
-    try:
-        # Load both datasets
-        datasets_to_compare = []
-        for dataset_id in [request.dataset_id_1, request.dataset_id_2]:
-            if dataset_id not in datasets:
-                dataset_path = UPLOAD_DIR / f"{dataset_id}.csv"
-                if not dataset_path.exists():
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail=f"Dataset {dataset_id} not found"
-                    )
-                df = pd.read_csv(dataset_path)
-                metadata_path = UPLOAD_DIR / f"{dataset_id}_metadata.json"
-                with open(metadata_path, 'r') as f:
-                    metadata = json.load(f)
-                datasets[dataset_id] = {'df': df, 'metadata': metadata}
-            
-            datasets_to_compare.append(datasets[dataset_id])
+    # Load both datasets
+    datasets_to_compare = []
+    for dataset_id in [request.dataset_id_1, request.dataset_id_2]:
+        dataset = get_dataset_in_memory(dataset_id)
+        if dataset is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Dataset {dataset_id} not found"
+            )
         
-        # Validate protected attribute for both datasets
-        for ds in datasets_to_compare:
-            validate_protected_attribute(ds['df'], request.protected_attr)
+        datasets_to_compare.append(dataset)
+    
+    # Validate protected attribute for both datasets
+    for ds in datasets_to_compare:
+        validate_protected_attribute(
+            ds['df'], request.protected_attr, ds['metadata'].get('column_summary')
+        )
+    
+    # Calculate metrics for both datasets
+    comparison_results = []
+    
+    # Create FairnessMetrics instances for both datasets concurrently, from the
+    # DataFrames looked up above (the dataset cache is only touched on the event loop)
+    loop = asyncio.get_running_loop()
+    dataset_1_fairness, dataset_2_fairness = await asyncio.gather(*[
+        loop.run_in_executor(METRIC_EXECUTOR, get_fairness, dataset_id, ds['df'], request.protected_attr)
+        for dataset_id, ds in zip((request.dataset_id_1, request.dataset_id_2), datasets_to_compare)
+    ])
+    
+    # Calculate every metric for both datasets concurrently
+    metric_results = await asyncio.gather(*[
+        loop.run_in_executor(METRIC_EXECUTOR, getattr(fairness, metric_info.get('method_name', metric_name)))
+        for metric_name, metric_info in ALL_METRICS.items()
+        for fairness in (dataset_1_fairness, dataset_2_fairness)
+    ])
+    
+    for i, (metric_name, metric_info) in enumerate(ALL_METRICS.items()):
+        result_1, result_2 = metric_results[2 * i], metric_results[2 * i + 1]
         
-        # Calculate metrics for both datasets
-        comparison_results = []
-        all_metrics = get_all_metrics()
+        # Extract assessment values for classification (MUST match logic in analyze endpoint)
+        try:
+            # Extract values from results
+            values_1 = result_1.get('values', result_1.get('value', {}))
+            values_2 = result_2.get('values', result_2.get('value', {}))
+            
+            value_1 = ASSESS_FN[metric_name](values_1)
+            value_2 = ASSESS_FN[metric_name](values_2)
+        except Exception as e:
+            print(f"Error extracting value for {metric_name}: {e}")
+            value_1 = 0
+            value_2 = 0
         
-        # Create FairnessMetrics instances
-        dataset_1_fairness = FairnessMetrics(datasets_to_compare[0]['df'], request.protected_attr)
-        dataset_2_fairness = FairnessMetrics(datasets_to_compare[1]['df'], request.protected_attr)
+        # Classify assessments
+        assessment_1 = classify_assessment(metric_name, value_1) if value_1 is not None else "Unknown"
+        assessment_2 = classify_assessment(metric_name, value_2) if value_2 is not None else "Unknown"
         
-        for metric_name, metric_info in all_metrics.items():
-            method_name = metric_info.get('method_name', metric_name)
-            
-            # Calculate metrics
-            result_1 = getattr(dataset_1_fairness, method_name)()
-            result_2 = getattr(dataset_2_fairness, method_name)()
-            
-            # Extract assessment values for classification (MUST match logic in analyze endpoint)
-            try:
-                # Extract values from results
-                values_1 = result_1.get('values', result_1.get('value', {}))
-                values_2 = result_2.get('values', result_2.get('value', {}))
-                
-                if metric_name == 'disparate_impact':
-                    # For DI, use the minimum ratio
-                    if isinstance(values_1, dict):
-                        numeric_values = [v for v in values_1.values() if isinstance(v, (int, float))]
-                        value_1 = min(numeric_values) if numeric_values else 1.0
-                    else:
-                        value_1 = float(values_1) if isinstance(values_1, (int, float)) else 1.0
-                    
-                    if isinstance(values_2, dict):
-                        numeric_values = [v for v in values_2.values() if isinstance(v, (int, float))]
-                        value_2 = min(numeric_values) if numeric_values else 1.0
-                    else:
-                        value_2 = float(values_2) if isinstance(values_2, (int, float)) else 1.0
-                        
-                elif metric_name in ['demographic_parity', 'equal_opportunity', 'predictive_equality', 
-                                      'false_negative_rate_parity', 'false_discovery_rate_parity',
-                                      'accuracy_equality', 'predictive_parity_ppv', 'calibration_by_group']:
-                    # For these, calculate max difference between groups
-                    if isinstance(values_1, dict):
-                        numeric_values = [v for v in values_1.values() if isinstance(v, (int, float))]
-                        value_1 = max(numeric_values) - min(numeric_values) if numeric_values else 0.0
-                    else:
-                        value_1 = abs(float(values_1)) if isinstance(values_1, (int, float)) else 0.0
-                    
-                    if isinstance(values_2, dict):
-                        numeric_values = [v for v in values_2.values() if isinstance(v, (int, float))]
-                        value_2 = max(numeric_values) - min(numeric_values) if numeric_values else 0.0
-                    else:
-                        value_2 = abs(float(values_2)) if isinstance(values_2, (int, float)) else 0.0
-                        
-                elif metric_name == 'equalized_odds':
-                    # For equalized odds, get max of TPR and FPR differences
-                    if isinstance(values_1, dict):
-                        tpr_values = [v.get('tpr', 0) for v in values_1.values() if isinstance(v, dict) and 'tpr' in v]
-                        fpr_values = [v.get('fpr', 0) for v in values_1.values() if isinstance(v, dict) and 'fpr' in v]
-                        tpr_diff = max(tpr_values) - min(tpr_values) if len(tpr_values) > 1 else 0
-                        fpr_diff = max(fpr_values) - min(fpr_values) if len(fpr_values) > 1 else 0
-                        value_1 = max(tpr_diff, fpr_diff)
-                    else:
-                        value_1 = abs(float(values_1)) if isinstance(values_1, (int, float)) else 0.0
-                    
-                    if isinstance(values_2, dict):
-                        tpr_values = [v.get('tpr', 0) for v in values_2.values() if isinstance(v, dict) and 'tpr' in v]
-                        fpr_values = [v.get('fpr', 0) for v in values_2.values() if isinstance(v, dict) and 'fpr' in v]
-                        tpr_diff = max(tpr_values) - min(tpr_values) if len(tpr_values) > 1 else 0
-                        fpr_diff = max(fpr_values) - min(fpr_values) if len(fpr_values) > 1 else 0
-                        value_2 = max(tpr_diff, fpr_diff)
-                    else:
-                        value_2 = abs(float(values_2)) if isinstance(values_2, (int, float)) else 0.0
-                else:
-                    # For single value metrics (SPD, AOD, Theil)
-                    value_1 = abs(float(values_1)) if isinstance(values_1, (int, float)) else 0.0
-                    value_2 = abs(float(values_2)) if isinstance(values_2, (int, float)) else 0.0
-            except Exception as e:
-                print(f"Error extracting value for {metric_name}: {e}")
-                value_1 = 0
-                value_2 = 0
-            
-            # Classify assessments
-            assessment_1 = classify_assessment(metric_name, value_1) if value_1 is not None else "Unknown"
-            assessment_2 = classify_assessment(metric_name, value_2) if value_2 is not None else "Unknown"
-            
-            # Determine change
-            severity_order = {"Fair": 0, "Warning": 1, "Violation": 2, "Unknown": 3}
-            severity_1 = severity_order.get(assessment_1, 3)
-            severity_2 = severity_order.get(assessment_2, 3)
-            
-            if severity_2 < severity_1:
-                change = "improved"
-            elif severity_2 > severity_1:
-                change = "worsened"
-            else:
-                change = "unchanged"
-            
-            comparison = {
-                'metric_name': metric_name,
-                'metric_display_name': metric_info.get('display_name', metric_name),
-                'dataset_1_value': value_1,
-                'dataset_2_value': value_2,
-                'dataset_1_assessment': assessment_1,
-                'dataset_2_assessment': assessment_2,
-                'change': change
-            }
-            comparison_results.append(comparison)
+        # Determine change
+        severity_order = {"Fair": 0, "Warning": 1, "Violation": 2, "Unknown": 3}
+        severity_1 = severity_order.get(assessment_1, 3)
+        severity_2 = severity_order.get(assessment_2, 3)
         
-        # Create summary
-        improved = sum(1 for r in comparison_results if r['change'] == 'improved')
-        worsened = sum(1 for r in comparison_results if r['change'] == 'worsened')
-        unchanged = sum(1 for r in comparison_results if r['change'] == 'unchanged')
+        if severity_2 < severity_1:
+            change = "improved"
+        elif severity_2 > severity_1:
+            change = "worsened"
+        else:
+            change = "unchanged"
         
-        summary = {
-            'total_metrics': len(comparison_results),
-            'improved': improved,
-            'worsened': worsened,
-            'unchanged': unchanged,
-            'overall': 'Improved' if improved > worsened else 'Worsened' if worsened > improved else 'Similar'
+        comparison = {
+            'metric_name': metric_name,
+            'metric_display_name': metric_info.get('display_name', metric_name),
+            'dataset_1_value': value_1,
+            'dataset_2_value': value_2,
+            'dataset_1_assessment': assessment_1,
+            'dataset_2_assessment': assessment_2,
+            'change': change
         }
-        
-        return ComparisonResponse(
-            dataset_1=datasets_to_compare[0]['metadata']['filename'],
-            dataset_2=datasets_to_compare[1]['metadata']['filename'],
-            protected_attr=request.protected_attr,
-            metrics_comparison=comparison_results,
-            summary=summary
-        )
+        comparison_results.append(comparison)
     
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error comparing datasets: {str(e)}"
-        )
+    # Create summary
+    change_counts = Counter(r['change'] for r in comparison_results)
+    improved = change_counts['improved']
+    worsened = change_counts['worsened']
+    unchanged = change_counts['unchanged']
+    
+    summary = {
+        'total_metrics': len(comparison_results),
+        'improved': improved,
+        'worsened': worsened,
+        'unchanged': unchanged,
+        'overall': 'Improved' if improved > worsened else 'Worsened' if worsened > improved else 'Similar'
+    }
+    
+    return model_response(ComparisonResponse(
+        dataset_1=datasets_to_compare[0]['metadata']['filename'],
+        dataset_2=datasets_to_compare[1]['metadata']['filename'],
+        protected_attr=request.protected_attr,
+        metrics_comparison=comparison_results,
+        summary=summary
+    ))
 
 @app.get("/api/metrics", response_model=List[MetricDefinition])
 async def get_metrics():
     """
     Get all available fairness metrics with their definitions
     """
-    try:
-        all_metrics = get_all_metrics()
-        return [MetricDefinition(**metric) for metric in all_metrics.values()]
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error retrieving metrics: {str(e)}"
-        )
+    return Response(content=METRICS_LIST_JSON, media_type="application/json")
 
 @app.delete("/api/dataset/{dataset_id}")
 async def delete_dataset(dataset_id: str):
     """
     Delete a dataset
     """
-    try:
-        # Remove from memory
-        if dataset_id in datasets:
-            del datasets[dataset_id]
-        
-        # Remove from disk
-        dataset_path = UPLOAD_DIR / f"{dataset_id}.csv"
-        metadata_path = UPLOAD_DIR / f"{dataset_id}_metadata.json"
-        
-        if dataset_path.exists():
-            dataset_path.unlink()
-        if metadata_path.exists():
-            metadata_path.unlink()
-        
-        return {"message": "Dataset deleted successfully"}
+    # Remove from memory
+    datasets.pop(dataset_id, None)
+    invalidate_fairness(dataset_id)
     
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error deleting dataset: {str(e)}"
-        )
+    # Remove from disk (Parquet, or CSV from older uploads)
+    paths = [
+        UPLOAD_DIR / f"{dataset_id}.parquet",
+        UPLOAD_DIR / f"{dataset_id}.csv",
+        UPLOAD_DIR / f"{dataset_id}_metadata.json"
+    ]
+    
+    for path in paths:
+        if path.exists():
+            path.unlink()
+    
+    return {"message": "Dataset deleted successfully"}
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,6 +1,13 @@
-from typing import Dict, List
+import math
+import sys
+import numpy as np
+import orjson
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple, Optional, Tuple
 
-METRIC_DEFINITIONS = {
+from models import MetricDefinition
+
+METRIC_DEFINITIONS = MappingProxyType({
     "demographic_parity": {
         "name": "demographic_parity",
         "display_name": "Demographic Parity",
@@ -313,21 +320,134 @@ METRIC_DEFINITIONS = {
             {"max": 10.0, "interpretation": "High inequality", "severity": "Violation"}
         ]
     }
-}
+})
 
-def get_metric_definition(metric_name: str) -> Dict[str, str]:
+# Placeholder fields for metrics without a definition, shared by every fallback
+_FALLBACK_FIELDS = MappingProxyType({
+    "definition": "Definition not available",
+    "formula": "Formula not available",
+    "interpretation": "Interpretation not available",
+    "context": "Context not available",
+    "fairness_implications": "Fairness implications not available",
+    "recommendations": "Recommendations not available"
+})
+
+def get_metric_definition(metric_name: str) -> Mapping[str, str]:
     """Get the definition and explanation for a specific metric"""
-    return METRIC_DEFINITIONS.get(metric_name, {
+    definition = METRIC_DEFINITIONS.get(metric_name)
+    if definition is not None:
+        return definition
+    return {
         "name": metric_name,
         "display_name": metric_name.replace("_", " ").title(),
-        "definition": "Definition not available",
-        "formula": "Formula not available",
-        "interpretation": "Interpretation not available",
-        "context": "Context not available",
-        "fairness_implications": "Fairness implications not available",
-        "recommendations": "Recommendations not available"
-    })
+        **_FALLBACK_FIELDS
+    }
 
-def get_all_metrics() -> Dict[str, Dict[str, str]]:
-    """Get all metric definitions"""
+def get_all_metrics() -> Mapping[str, Mapping[str, Any]]:
+    """Get all metric definitions (read-only, so returned without copying)"""
     return METRIC_DEFINITIONS
+
+def _intern_segments(definitions: Mapping[str, dict]):
+    """
+    Store each metric's value_segments as a tuple of shared segment dicts: identical
+    segments across metrics become one object and their strings are interned
+    """
+    canonical = {}
+    for metric in definitions.values():
+        if 'value_segments' not in metric:
+            continue
+        segments = []
+        for segment in metric['value_segments']:
+            key = tuple(sorted(segment.items()))
+            if key not in canonical:
+                canonical[key] = {
+                    field: sys.intern(value) if isinstance(value, str) else value
+                    for field, value in segment.items()
+                }
+            segments.append(canonical[key])
+        metric['value_segments'] = tuple(segments)
+
+def _freeze(value, frozen: dict):
+    """
+    Read-only copy of a definition value: dicts become MappingProxyType and lists
+    tuples, all the way down. Objects shared between metrics stay shared
+    """
+    if isinstance(value, (Mapping, list, tuple)):
+        if id(value) not in frozen:
+            if isinstance(value, Mapping):
+                frozen[id(value)] = MappingProxyType({key: _freeze(item, frozen) for key, item in value.items()})
+            else:
+                frozen[id(value)] = tuple(_freeze(item, frozen) for item in value)
+        return frozen[id(value)]
+    return value
+
+_intern_segments(METRIC_DEFINITIONS)
+# Nested per-metric dicts and lists are frozen too, not just the top level
+METRIC_DEFINITIONS = _freeze(METRIC_DEFINITIONS, {})
+
+# Definitions validated once at import, and their serialized /api/metrics list
+METRIC_MODELS = MappingProxyType({
+    name: MetricDefinition(**definition) for name, definition in METRIC_DEFINITIONS.items()
+})
+METRICS_LIST_JSON = orjson.dumps([model.model_dump() for model in METRIC_MODELS.values()])
+
+class SegmentRow(NamedTuple):
+    """A value segment with open bounds materialized as -inf / inf"""
+    min: float
+    max: float
+    severity: str
+    interpretation: str
+
+def _segment_row(segment: dict) -> SegmentRow:
+    return SegmentRow(
+        float(segment.get('min', -math.inf)),
+        float(segment.get('max', math.inf)),
+        segment['severity'],
+        segment['interpretation']
+    )
+
+def _first_min_max_match(rows: Tuple[SegmentRow, ...], value: float) -> Optional[int]:
+    """Index of the first segment whose min is <= value or whose max is > value"""
+    for i, row in enumerate(rows):
+        if row.min != -math.inf and value >= row.min:
+            return i
+        if row.max != math.inf and value < row.max:
+            return i
+    return None
+
+def _build_segment_lookup(metric_name: str, rows: Tuple[SegmentRow, ...]) -> dict:
+    """
+    Precompute boundary arrays so a value is classified with np.searchsorted instead of
+    a linear scan. Matches the scan order: the first segment whose max is >= |value|;
+    for disparate impact, first the min/max rule above, which is constant between
+    consecutive boundaries and so is resolved once per interval here.
+    """
+    maxes = np.array([row.max for row in rows], dtype=np.float64)
+    lookup = {
+        # Running max: the first position reaching |value| is the first segment with max >= |value|
+        'max_bounds': np.maximum.accumulate(maxes),
+        'min_bounds': None,
+        'min_matches': None,
+        'segments': rows
+    }
+    
+    if metric_name == "disparate_impact":
+        bounds = np.unique([
+            bound for row in rows for bound in (row.min, row.max) if not math.isinf(bound)
+        ]).astype(np.float64)
+        interval_starts = [-math.inf] + bounds.tolist()
+        lookup['min_bounds'] = bounds
+        lookup['min_matches'] = [_first_min_max_match(rows, start) for start in interval_starts]
+    
+    return lookup
+
+# Value segments preparsed into rows, and per-metric severity lookup tables, built once at import
+SEGMENT_ROWS = {
+    name: tuple(_segment_row(segment) for segment in metric.get('value_segments', []))
+    for name, metric in METRIC_DEFINITIONS.items()
+}
+SEGMENT_LOOKUPS = {
+    name: _build_segment_lookup(name, rows)
+    for name, rows in SEGMENT_ROWS.items()
+    if rows
+}
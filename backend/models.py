@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
@@ -29,20 +30,26 @@ class ComparisonRequest(BaseModel):
     dataset_id_2: str
     protected_attr: str
 
-class MetricResult(BaseModel):
+# Response-only models are plain slotted dataclasses: they are built by the API itself,
+# so there is nothing to validate, and they are encoded directly with orjson
+
+@dataclass(slots=True, kw_only=True)
+class MetricResult:
     metric_name: str
     values: Union[Dict[str, Any], float, int]
     visualization_data: Optional[Dict[str, Any]] = None
     fairness_assessment: str
     explanation: Dict[str, Any]  # Changed from Dict[str, str] to Dict[str, Any] to support lists and nested dicts
 
-class AnalysisResponse(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class AnalysisResponse:
     dataset_id: str
     protected_attr: str
     metrics: List[MetricResult]
     summary: Dict[str, Any]
 
-class ComparisonResponse(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class ComparisonResponse:
     dataset_1: str
     dataset_2: str
     protected_attr: str
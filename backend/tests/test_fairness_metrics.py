@@ -0,0 +1,44 @@
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fairness_metrics import FairnessMetrics
+
+
+def make_dataset(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'race': rng.choice(['A', 'B'], n),
+        'screening_score': rng.normal(60, 15, n).round(1),
+        'shortlisted': rng.integers(0, 2, n),
+    })
+    # Rows with a missing protected value form a group with no shortlisting rate
+    df.loc[::7, 'race'] = None
+    return df
+
+
+def test_disparate_impact_ignores_missing_protected_value():
+    df = make_dataset()
+    result = FairnessMetrics(df, 'race').disparate_impact()
+
+    rates = df.dropna(subset=['race']).groupby('race')['shortlisted'].mean()
+    expected_min = rates.min() / rates.max()
+
+    assert math.isclose(result['min_ratio'], expected_min)
+    assert math.isclose(result['values']['A'], rates['A'] / rates.max())
+    assert math.isclose(result['values']['B'], rates['B'] / rates.max())
+    assert result['fairness_assessment'] == ('Fair' if expected_min >= 0.8 else 'Violation')
+
+
+def test_bar_metrics_ignore_missing_protected_value():
+    df = make_dataset()
+    result = FairnessMetrics(df, 'race').demographic_parity()
+
+    rates = df.dropna(subset=['race']).groupby('race')['shortlisted'].mean()
+
+    assert math.isclose(result['max_difference'], rates.max() - rates.min())
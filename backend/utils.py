@@ -1,9 +1,22 @@
 import pandas as pd
 import numpy as np
-from typing import Optional
-import uuid
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+from typing import BinaryIO, List, Optional
+import os
+import json
+import time
 from datetime import datetime
 
+# Worker pool for per-column statistics
+STATS_EXECUTOR = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+
+# Text columns with fewer unique values than this fraction of rows become categoricals
+CATEGORICAL_MAX_RATIO = 0.5
+
 def generate_age_group(age: int) -> str:
     """Generate age group from age value"""
     if 20 <= age <= 30:
@@ -17,27 +30,138 @@ def generate_age_group(age: int) -> str:
     else:
         return "Other"
 
+# Columns every uploaded dataset must have
+REQUIRED_COLUMNS = frozenset(['shortlisted'])
+
+# Age group bands (inclusive bounds) in category code order; anything else is "Other"
+AGE_GROUP_BOUNDS = ((20, 30), (31, 40), (41, 50), (51, 60))
+AGE_GROUP_LABELS = ["20-30", "31-40", "41-50", "51-60", "Other"]
+
+def assign_age_groups(age: pd.Series) -> pd.Categorical:
+    """Vectorized generate_age_group over a whole column, as a categorical"""
+    values = age.to_numpy(dtype=np.float64, na_value=np.nan)
+    codes = np.full(len(values), len(AGE_GROUP_BOUNDS), dtype=np.int8)
+    for code, (low, high) in enumerate(AGE_GROUP_BOUNDS):
+        codes[(values >= low) & (values <= high)] = code
+    return pd.Categorical.from_codes(codes, categories=AGE_GROUP_LABELS).remove_unused_categories()
+
+class _UUIDPool:
+    """
+    Version 4 UUID strings sliced from a batch of os.urandom bytes, so the syscall
+    and UUID object construction are amortized over 256 ids. Used from the event
+    loop only, so no locking
+    """
+    __slots__ = ('buf', 'i')
+    BATCH = 256
+
+    def __init__(self):
+        self.buf = b''
+        self.i = 0
+
+    def refill(self):
+        ids = np.frombuffer(os.urandom(16 * self.BATCH), dtype=np.uint8).reshape(self.BATCH, 16).copy()
+        ids[:, 6] = (ids[:, 6] & 0x0F) | 0x40  # version 4
+        ids[:, 8] = (ids[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+        self.buf = ids.tobytes().hex()
+        self.i = 0
+
+    def next(self) -> str:
+        if self.i >= len(self.buf):
+            self.refill()
+        h = self.buf[self.i:self.i + 32]
+        self.i += 32
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+_uuid_pool = _UUIDPool()
+# A forked worker must not hand out the same ids as its parent
+os.register_at_fork(after_in_child=_uuid_pool.refill)
+
+# Upload timestamp at second resolution, reformatted only when the second changes.
+# Computed lazily rather than by a ticking task, since the serverless handler runs
+# without lifespan events
+_timestamp = (0, '')
+
+def current_timestamp() -> str:
+    """Current local time as an ISO string with second precision"""
+    global _timestamp
+    now = int(time.time())
+    if now != _timestamp[0]:
+        _timestamp = (now, datetime.fromtimestamp(now).isoformat(timespec='seconds'))
+    return _timestamp[1]
+
+def dedupe_column_names(names: List[str]) -> List[str]:
+    """Rename repeated column names to name.1, name.2, ... as pandas.read_csv does"""
+    header = set(names)
+    counts = defaultdict(int)
+    deduped = []
+    for original in names:
+        name = original
+        count = counts[name]
+        while count > 0:
+            counts[original] = count + 1
+            name = f"{original}.{count}"
+            # Skip suffixes that are already taken by another header name
+            count = count + 1 if name in header else counts[name]
+        deduped.append(name)
+        counts[name] = count + 1
+    return deduped
+
+def parse_upload(source: BinaryIO) -> pd.DataFrame:
+    """
+    Parse an uploaded CSV with the multi-threaded PyArrow reader, falling back to pandas.
+    Low-cardinality text columns are dictionary-encoded while parsing and arrive as categoricals
+    """
+    try:
+        table = pacsv.read_csv(
+            source,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=1 << 20),
+            convert_options=pacsv.ConvertOptions(
+                strings_can_be_null=True,
+                auto_dict_encode=True,
+                auto_dict_max_cardinality=256
+            )
+        )
+    except Exception:
+        source.seek(0)
+        return pd.read_csv(source)
+    # The PyArrow reader keeps duplicate header names as they are
+    if len(set(table.column_names)) < table.num_columns:
+        table = table.rename_columns(dedupe_column_names(table.column_names))
+    return table.to_pandas()
+
 def process_uploaded_dataset(df: pd.DataFrame, filename: str) -> dict:
     """
     Process uploaded dataset: generate age_group, validate columns, create metadata
     """
     # Generate unique dataset ID
-    dataset_id = str(uuid.uuid4())
+    dataset_id = _uuid_pool.next()
+    
+    # Hashed column lookups, built once
+    col_set = set(df.columns)
     
     # Generate age_group if age column exists and age_group doesn't
-    if 'age' in df.columns and 'age_group' not in df.columns:
-        df['age_group'] = df['age'].apply(generate_age_group)
+    has_age_group = 'age_group' in col_set
+    if 'age' in col_set and not has_age_group:
+        df['age_group'] = assign_age_groups(df['age'])
         has_age_group = True
-    else:
-        has_age_group = 'age_group' in df.columns
     
     # Validate required columns
-    required_columns = ['shortlisted']
-    missing_columns = [col for col in required_columns if col not in df.columns]
+    missing_columns = sorted(REQUIRED_COLUMNS - col_set)
     
     if missing_columns:
         raise ValueError(f"Missing required columns: {missing_columns}")
     
+    # Per-column summary, kept in the metadata for validate_protected_attribute so
+    # validation is a lookup
+    summary = summarize_columns(df)
+    
+    # Store low-cardinality text columns (protected attributes) as categoricals so
+    # groupby runs on integer codes instead of hashing strings, reusing the summary's
+    # unique counts
+    for col in df.select_dtypes(include=['object', 'string']).columns:
+        if summary[str(col)]['nunique'] < CATEGORICAL_MAX_RATIO * len(df):
+            df[col] = df[col].astype('category')
+    
     # Create metadata
     metadata = {
         'dataset_id': dataset_id,
@@ -45,65 +169,132 @@ def process_uploaded_dataset(df: pd.DataFrame, filename: str) -> dict:
         'rows': len(df),
         'columns': len(df.columns),
         'column_names': df.columns.tolist(),
-        'upload_date': datetime.now().isoformat(),
+        'upload_date': current_timestamp(),
         'has_age_group': has_age_group,
-        'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()}
+        'dtypes': df.dtypes.astype(str).to_dict(),
+        'column_summary': summary
     }
     
     return df, metadata
 
+def dataset_to_table(df: pd.DataFrame) -> pa.Table:
+    """
+    Convert a processed dataset to the Arrow table it is stored as, so a dataset that
+    can't be written as Parquet is rejected at upload. Raises ValueError
+    """
+    names = [str(col) for col in df.columns]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate column names: {duplicates}")
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowException, TypeError) as e:
+        raise ValueError(str(e)) from e
+
+def write_dataset(dataset_path, table: pa.Table, metadata_path, metadata: dict):
+    """Persist a processed dataset as Parquet along with its metadata JSON (blocking)"""
+    pq.write_table(table, dataset_path, compression='snappy')
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f)
+
 def get_dataset_statistics(df: pd.DataFrame) -> dict:
     """Calculate basic statistics for the dataset"""
+    # Only columns that have missing values are summed (and reported)
+    na_mask = df.isna()
+    has_missing = na_mask.any()
+    missing_values = na_mask.loc[:, has_missing].sum() if has_missing.any() else pd.Series(dtype=np.int64)
     stats = {
         'rows': len(df),
         'columns': len(df.columns),
         'numeric_columns': df.select_dtypes(include=[np.number]).columns.tolist(),
         'categorical_columns': df.select_dtypes(include=['object', 'category']).columns.tolist(),
-        'missing_values': df.isnull().sum().to_dict(),
+        'missing_values': missing_values.to_dict(),
         'column_stats': {}
     }
     
-    # Get basic stats for numeric columns
-    for col in stats['numeric_columns']:
-        stats['column_stats'][col] = {
-            'mean': float(df[col].mean()) if not df[col].isnull().all() else None,
-            'median': float(df[col].median()) if not df[col].isnull().all() else None,
-            'min': float(df[col].min()) if not df[col].isnull().all() else None,
-            'max': float(df[col].max()) if not df[col].isnull().all() else None,
-            'std': float(df[col].std()) if not df[col].isnull().all() else None
-        }
+    # Get basic stats for numeric columns in one aggregation pass (all-null columns get None)
+    if stats['numeric_columns']:
+        numeric_stats = df[stats['numeric_columns']].agg(['mean', 'median', 'min', 'max', 'std'])
+        missing = missing_values.to_dict()
+        for col, values in numeric_stats.to_dict().items():
+            all_null = missing.get(col, 0) == len(df)
+            stats['column_stats'][col] = {
+                stat: float(value) if not all_null else None
+                for stat, value in values.items()
+            }
     
     # Get value counts for categorical columns
-    for col in stats['categorical_columns']:
-        value_counts = df[col].value_counts().head(10).to_dict()
-        stats['column_stats'][col] = {
-            'unique_values': int(df[col].nunique()),
-            'top_values': {str(k): int(v) for k, v in value_counts.items()}
-        }
+    if stats['categorical_columns']:
+        unique_values = df[stats['categorical_columns']].nunique().to_dict()
+        # Columns are independent and pandas' hash aggregation releases the GIL, so count them in parallel
+        top_counts = STATS_EXECUTOR.map(
+            lambda col: df[col].value_counts().head(10).to_dict(), stats['categorical_columns']
+        )
+        for col, value_counts in zip(stats['categorical_columns'], top_counts):
+            stats['column_stats'][col] = {
+                'unique_values': int(unique_values[col]),
+                'top_values': {str(k): int(v) for k, v in value_counts.items()}
+            }
     
     return stats
 
-def validate_protected_attribute(df: pd.DataFrame, protected_attr: str) -> bool:
+def summarize_columns(df: pd.DataFrame) -> dict:
+    """Unique value count and all-null flag per column"""
+    unique_values = df.nunique(dropna=True).to_dict()
+    all_null = (df.isna().sum() == len(df)).to_dict()
+    return {
+        str(col): {'nunique': int(unique_values[col]), 'all_null': bool(all_null[col])}
+        for col in df.columns
+    }
+
+def validate_protected_attribute(df: pd.DataFrame, protected_attr: str,
+                                 column_summary: Optional[dict] = None) -> bool:
     """Validate that the protected attribute exists and has valid values"""
     if protected_attr not in df.columns:
         raise ValueError(f"Protected attribute '{protected_attr}' not found in dataset")
     
-    if df[protected_attr].isnull().all():
+    # Use the summary computed at upload, scanning the column only if it is missing
+    summary = (column_summary or {}).get(protected_attr)
+    if summary is None:
+        summary = {
+            'nunique': df[protected_attr].nunique(),
+            'all_null': df[protected_attr].isnull().all()
+        }
+    
+    if summary['all_null']:
         raise ValueError(f"Protected attribute '{protected_attr}' has no valid values")
     
-    unique_values = df[protected_attr].nunique()
-    if unique_values < 2:
+    if summary['nunique'] < 2:
         raise ValueError(f"Protected attribute '{protected_attr}' must have at least 2 unique values")
     
     return True
 
 def prepare_dataframe_for_json(df: pd.DataFrame, max_rows: Optional[int] = None) -> list:
     """Convert DataFrame to JSON-serializable list of dicts"""
-    if max_rows:
+    # Slice before any conversion so only the preview rows are touched
+    if max_rows is not None:
         df = df.head(max_rows)
     
-    # Replace NaN with None for JSON serialization
-    df = df.replace({np.nan: None})
+    columns = df.columns.tolist()
+    
+    # Fast path: a single NumPy numeric dtype with no NaNs converts as one 2D block
+    dtypes = df.dtypes.unique()
+    if len(dtypes) == 1 and isinstance(dtypes[0], np.dtype) and dtypes[0].kind in 'biuf':
+        values = df.to_numpy()
+        if dtypes[0].kind != 'f' or not np.isnan(values).any():
+            return [dict(zip(columns, row)) for row in values.tolist()]
+    
+    # Convert column by column: NaN-free columns go straight to Python lists, and
+    # only columns with missing values get an object copy with None at the NaN mask
+    arrays = []
+    for i in range(df.shape[1]):
+        col = df.iloc[:, i]
+        if not col.hasnans:
+            arrays.append(col.to_numpy().tolist() if pd.api.types.is_numeric_dtype(col) else col.tolist())
+        else:
+            values = col.to_numpy(dtype=object, copy=True)
+            values[col.isna().to_numpy()] = None
+            arrays.append(values.tolist())
     
-    # Convert to list of dicts
-    return df.to_dict(orient='records')
+    # Zip columns into list of dicts
+    return [dict(zip(columns, row)) for row in zip(*arrays)]
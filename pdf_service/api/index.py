@@ -1,10 +1,16 @@
+import importlib.util
+import os
 import sys
-from pathlib import Path
 
-# Add parent directory to path so we can import app
-sys.path.append(str(Path(__file__).parent.parent))
+# Load app.py from the service root by file location, so the cold start doesn't
+# mutate sys.path (and invalidate the import path caches) just to import it
+_APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+_spec = importlib.util.spec_from_file_location("app", _APP_PATH)
+_module = importlib.util.module_from_spec(_spec)
+sys.modules["app"] = _module
+_spec.loader.exec_module(_module)
 
-from app import app
+app = _module.app
 
 # Vercel serverless handler
 handler = app
@@ -1,19 +1,29 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, CondPageBreak, KeepTogether, Image
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from reportlab.graphics.shapes import Drawing, Group, String
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from svglib.svglib import svg2rlg
 import io
 import os
+import hashlib
+import orjson
+from xml.sax.saxutils import escape
+import threading
+import time
+import queue
+import uuid
+from collections import OrderedDict
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import Dict, Any, List
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import numpy as np
+from typing import Dict, Any, List, Optional, Tuple, Callable
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,32 +31,94 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
-def create_bar_chart(data: Dict[str, float], title: str, ylabel: str = "Rate") -> io.BytesIO:
-    """Create a bar chart and return as BytesIO"""
-    fig, ax = plt.subplots(figsize=(8, 5))
-    
-    groups = list(data.keys())
-    values = list(data.values())
-    
-    ax.bar(groups, values, color='steelblue', alpha=0.7)
-    ax.set_xlabel('Group', fontsize=12)
-    ax.set_ylabel(ylabel, fontsize=12)
-    ax.set_title(title, fontsize=14, fontweight='bold')
-    ax.grid(axis='y', alpha=0.3)
-    
-    plt.tight_layout()
-    
-    # Save to BytesIO
+# One figure per chart type, cleared and redrawn for every chart instead of
+# being created and closed each time. pyplot state is not thread-safe, so
+# drawing on them is serialised with CHART_LOCK.
+CHART_LOCK = threading.Lock()
+SCATTER_FIG = SCATTER_AX = None
+HEATMAP_FIG = HEATMAP_AX = None
+heatmap_colorbar = None
+DEFAULT_SUBPLOT_PARAMS = None
+
+# matplotlib and numpy are imported on the first matplotlib chart rather than at
+# startup, so workers boot (and answer /health) without paying for them
+plt = None
+np = None
+matplotlib_lock = threading.Lock()
+
+def load_matplotlib():
+    """Import matplotlib/numpy and create the cached chart figures once"""
+    global plt, np, SCATTER_FIG, SCATTER_AX, HEATMAP_FIG, HEATMAP_AX, DEFAULT_SUBPLOT_PARAMS
+    with matplotlib_lock:
+        if plt is not None:
+            return
+        import matplotlib
+        matplotlib.use('Agg')  # Use non-interactive backend
+        import matplotlib.pyplot as pyplot
+        import numpy
+
+        np = numpy
+        SCATTER_FIG, SCATTER_AX = pyplot.subplots(figsize=(8, 5))
+        HEATMAP_FIG, HEATMAP_AX = pyplot.subplots(figsize=(8, 5))
+        DEFAULT_SUBPLOT_PARAMS = {k: matplotlib.rcParams[f'figure.subplot.{k}']
+                                  for k in ('left', 'bottom', 'right', 'top', 'wspace', 'hspace')}
+        plt = pyplot
+
+def render_chart(fig) -> io.BytesIO:
+    """Lay out a cached figure and save it as SVG into a BytesIO"""
+    # tight_layout starts from the current subplot params, so reset them to
+    # what a fresh figure would have before laying it out again
+    fig.subplots_adjust(**DEFAULT_SUBPLOT_PARAMS)
+    fig.tight_layout()
     img_buffer = io.BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
+    # SVG keeps the chart as vectors: svglib turns it into a ReportLab drawing,
+    # so nothing is rasterised, PNG-encoded or decoded again on the way in
+    fig.savefig(img_buffer, format='svg', bbox_inches='tight')
     img_buffer.seek(0)
-    plt.close()
-    
     return img_buffer
 
+def create_bar_chart(data: Dict[str, float], title: str, ylabel: str = "Rate") -> Drawing:
+    """Create a bar chart as a ReportLab vector drawing"""
+    drawing = Drawing(5*inch, 3*inch)
+    values = list(data.values())
+
+    chart = VerticalBarChart()
+    chart.x = 50
+    chart.y = 45
+    chart.width = drawing.width - 65
+    chart.height = drawing.height - 80
+    chart.data = [values]
+    chart.categoryAxis.categoryNames = [str(group) for group in data]
+    chart.categoryAxis.labels.fontSize = 8
+    if len(values) > 6:
+        chart.categoryAxis.labels.angle = 30
+        chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.valueAxis.valueMin = min(0, min(values))
+    chart.valueAxis.labels.fontSize = 8
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = colors.lightgrey
+    chart.bars[0].fillColor = colors.Color(*colors.steelblue.rgb(), alpha=0.7)
+    chart.bars[0].strokeColor = None
+    drawing.add(chart)
+
+    drawing.add(String(drawing.width / 2, drawing.height - 15, title, textAnchor='middle',
+                       fontName='Helvetica-Bold', fontSize=12))
+    drawing.add(String(chart.x + chart.width / 2, 5, 'Group', textAnchor='middle', fontSize=10))
+    drawing.add(Group(String(0, 0, ylabel, textAnchor='middle', fontSize=10),
+                      transform=(0, 1, -1, 0, 12, chart.y + chart.height / 2)))
+
+    return drawing
+
 def create_scatter_chart(data: Dict[str, Dict[str, float]], title: str) -> io.BytesIO:
     """Create a scatter plot for equalized odds"""
-    fig, ax = plt.subplots(figsize=(8, 5))
+    load_matplotlib()
+    with CHART_LOCK:
+        return draw_scatter_chart(data, title)
+
+def draw_scatter_chart(data: Dict[str, Dict[str, float]], title: str) -> io.BytesIO:
+    """Draw onto the cached scatter figure; the caller holds CHART_LOCK"""
+    ax = SCATTER_AX
+    ax.clear()
     
     for group, values in data.items():
         ax.scatter(values.get('fpr', 0), values.get('tpr', 0), 
@@ -58,14 +130,7 @@ def create_scatter_chart(data: Dict[str, Dict[str, float]], title: str) -> io.By
     ax.legend()
     ax.grid(alpha=0.3)
     
-    plt.tight_layout()
-    
-    img_buffer = io.BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
-    img_buffer.seek(0)
-    plt.close()
-    
-    return img_buffer
+    return render_chart(SCATTER_FIG)
 
 def create_heatmap_chart(data: Dict[str, List[float]], bins: List[str] | None, title: str) -> io.BytesIO:
     """Create a heatmap for calibration by group"""
@@ -76,19 +141,39 @@ def create_heatmap_chart(data: Dict[str, List[float]], bins: List[str] | None, t
     first_group_values = data[groups[0]] if data[groups[0]] else []
     bin_labels = bins if bins else [f"Bin {i+1}" for i in range(len(first_group_values))]
 
-    matrix = []
-    for group in groups:
-        values = data[group]
-        row = []
-        for idx in range(len(bin_labels)):
-            value = values[idx] if idx < len(values) else 0
-            row.append(value)
-        matrix.append(row)
+    load_matplotlib()
 
-    matrix_np = np.array(matrix)
+    n_bins = len(bin_labels)
+    rows = [data[group] for group in groups]
+    if all(len(row) == n_bins for row in rows):
+        # Every group has a value per bin: convert the whole grid in one call
+        matrix_np = np.array(rows, dtype=float).reshape(len(groups), n_bins)
+    else:
+        # Rows shorter than the bin labels are left zero-padded
+        matrix_np = np.zeros((len(groups), n_bins))
+        for i, row in enumerate(rows):
+            row = row[:n_bins]
+            matrix_np[i, :len(row)] = row
+
+    with CHART_LOCK:
+        return draw_heatmap_chart(matrix_np, groups, bin_labels, title)
 
-    fig, ax = plt.subplots(figsize=(8, 5))
-    cax = ax.imshow(matrix_np, aspect='auto', cmap='Blues')
+def draw_heatmap_chart(matrix_np: 'np.ndarray', groups: List[str], bin_labels: List[str], title: str) -> io.BytesIO:
+    """Draw onto the cached heatmap figure; the caller holds CHART_LOCK"""
+    global heatmap_colorbar
+    ax = HEATMAP_AX
+    # Drop the previous colorbar first so the heatmap axes get their space back
+    if heatmap_colorbar is not None:
+        heatmap_colorbar.remove()
+        heatmap_colorbar = None
+    ax.clear()
+    # Cells as vector quads centred on integer positions, top row first like imshow.
+    # An image (imshow, or the colorbar's rasterised gradient) would make svglib
+    # write a temporary PNG per chart that it never deletes
+    n_groups, n_bins = matrix_np.shape
+    cax = ax.pcolormesh(np.arange(n_bins + 1) - 0.5, np.arange(n_groups + 1) - 0.5, matrix_np, cmap='Blues')
+    ax.set_xlim(-0.5, n_bins - 0.5)
+    ax.set_ylim(n_groups - 0.5, -0.5)
 
     ax.set_xticks(range(len(bin_labels)))
     ax.set_xticklabels(bin_labels, rotation=45, ha='right', fontsize=8)
@@ -96,74 +181,190 @@ def create_heatmap_chart(data: Dict[str, List[float]], bins: List[str] | None, t
     ax.set_yticklabels(groups, fontsize=10)
     ax.set_title(title, fontsize=14, fontweight='bold')
 
-    for i in range(len(groups)):
-        for j in range(len(bin_labels)):
-            ax.text(j, i, f"{matrix_np[i, j]:.2f}", ha='center', va='center', color='black', fontsize=7)
+    # Format every cell in one pass, then place the labels row-major
+    for k, label in enumerate([f"{value:.2f}" for value in matrix_np.ravel().tolist()]):
+        ax.text(k % n_bins, k // n_bins, label, ha='center', va='center', color='black', fontsize=7)
 
-    fig.colorbar(cax, ax=ax, fraction=0.046, pad=0.04, label='Actual shortlisting rate')
-    plt.tight_layout()
+    heatmap_colorbar = HEATMAP_FIG.colorbar(cax, ax=ax, fraction=0.046, pad=0.04, label='Actual shortlisting rate')
+    heatmap_colorbar.solids.set_rasterized(False)
 
-    img_buffer = io.BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
-    img_buffer.seek(0)
-    plt.close()
+    return render_chart(HEATMAP_FIG)
 
-    return img_buffer
+# matplotlib charts are rendered in worker processes so several can render
+# at once. The server is multithreaded, so workers are started from a
+# forkserver (or spawned) rather than forked from a request thread, and import
+# matplotlib once when they start.
+CHART_WORKERS = int(os.getenv('CHART_WORKERS', os.cpu_count() or 1))
+# Seconds to wait for a report's worker-rendered charts before leaving them out
+CHART_TIMEOUT = float(os.getenv('CHART_TIMEOUT', 60))
+CHART_ERRORS = {'scatter': "Error creating scatter plot", 'heatmap': "Error creating heatmap"}
+chart_pool = None
+chart_pool_lock = threading.Lock()
+
+def get_chart_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the shared chart worker pool, or None where it can't be used"""
+    global chart_pool
+    if CHART_WORKERS <= 1:
+        return None
+    with chart_pool_lock:
+        if chart_pool is None:
+            try:
+                start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                chart_pool = ProcessPoolExecutor(max_workers=CHART_WORKERS,
+                                                 mp_context=multiprocessing.get_context(start_method),
+                                                 initializer=load_matplotlib)
+            except (ValueError, OSError, NotImplementedError):
+                # No fork start method or no multiprocessing support (e.g. serverless)
+                return None
+        return chart_pool
+
+def discard_chart_pool(pool: ProcessPoolExecutor):
+    """Drop a broken chart pool so the next report starts a fresh one"""
+    global chart_pool
+    with chart_pool_lock:
+        if chart_pool is pool:
+            chart_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def render_chart_task(task: Tuple[str, Dict[str, Any], str, Optional[List[str]]]) -> bytes:
+    """Render one matplotlib chart to SVG bytes"""
+    viz_type, values, title, bins = task
+    if viz_type == 'heatmap':
+        return create_heatmap_chart(values, bins, title).getvalue()
+    return create_scatter_chart(values, title).getvalue()
+
+def render_matplotlib_charts(tasks: Dict[int, Tuple[str, Dict[str, Any], str, Optional[List[str]]]]) -> Dict[int, Optional[Drawing]]:
+    """Render the matplotlib charts of a report as drawings, keyed by metric index"""
+    pool = get_chart_pool() if len(tasks) > 1 else None
+    futures = {}
+    if pool:
+        try:
+            futures = {i: pool.submit(render_chart_task, task) for i, task in tasks.items()}
+        except BrokenProcessPool:
+            # A worker died while the pool was idle: render this report in-process
+            discard_chart_pool(pool)
+            futures = {}
+
+    deadline = time.monotonic() + CHART_TIMEOUT
+    charts = {}
+    for i, task in tasks.items():
+        try:
+            try:
+                if i in futures:
+                    svg = futures[i].result(timeout=max(deadline - time.monotonic(), 0))
+                else:
+                    svg = render_chart_task(task)
+            except FutureTimeoutError:
+                futures[i].cancel()
+                raise TimeoutError(f"not rendered within {CHART_TIMEOUT:g}s")
+            except BrokenProcessPool:
+                discard_chart_pool(pool)
+                svg = render_chart_task(task)
+            charts[i] = svg2rlg(io.BytesIO(svg))
+        except Exception as e:
+            print(f"{CHART_ERRORS[task[0]]}: {e}")
+            charts[i] = None
+    return charts
+
+# Styles, built once at import rather than for every report
+BRAND_BLUE = colors.HexColor('#2563eb')
+STYLES = getSampleStyleSheet()
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#1a1a1a'),
+    spaceAfter=30,
+    alignment=TA_CENTER
+)
+
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=STYLES['Heading2'],
+    fontSize=16,
+    textColor=BRAND_BLUE,
+    spaceAfter=12,
+    spaceBefore=12
+)
+
+SUBHEADING_STYLE = ParagraphStyle(
+    'CustomSubHeading',
+    parent=STYLES['Heading3'],
+    fontSize=14,
+    textColor=colors.HexColor('#4b5563'),
+    spaceAfter=10
+)
+
+BODY_STYLE = ParagraphStyle(
+    'CustomBody',
+    parent=STYLES['BodyText'],
+    fontSize=11,
+    textColor=colors.HexColor('#1f2937'),
+    alignment=TA_JUSTIFY
+)
 
-def generate_pdf_report(data: Dict[str, Any]) -> io.BytesIO:
+# Dataset information table rows as (label, payload key)
+DATASET_INFO_FIELDS = (
+    ('Filename', 'dataset_name'),
+    ('Rows', 'rows'),
+    ('Columns', 'columns'),
+    ('Upload Date', 'upload_date'),
+    ('Protected Attribute', 'protected_attr'),
+)
+DATASET_COL_WIDTHS = (2*inch, 4*inch)
+
+DATASET_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), BRAND_BLUE),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+# Badge colours by assessment; anything else is shown as a violation
+ASSESSMENT_HEX = {'Fair': colors.green.hexval(), 'Warning': colors.orange.hexval()}
+VIOLATION_HEX = colors.red.hexval()
+
+class PDFSink:
+    """Write-only target for doc.build that keeps the chunks ReportLab writes"""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(data)
+        return len(data)
+
+    def getvalue(self) -> bytes:
+        # ReportLab writes the finished document in a single call, so this is
+        # normally the bytes object it produced rather than a copy of it
+        return b''.join(self.chunks)
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+def generate_pdf_report(data: Dict[str, Any], progress: Optional[ProgressCallback] = None) -> bytes:
     """
     Generate comprehensive PDF report with all fairness metrics
+
+    progress, if given, is called with a status dict as each stage advances
     """
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter,
+    report = progress or (lambda event: None)
+    sink = PDFSink()
+    doc = SimpleDocTemplate(sink, pagesize=letter,
                            rightMargin=72, leftMargin=72,
                            topMargin=72, bottomMargin=18)
     
     # Container for PDF elements
     elements = []
     
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#2563eb'),
-        spaceAfter=12,
-        spaceBefore=12
-    )
-    
-    subheading_style = ParagraphStyle(
-        'CustomSubHeading',
-        parent=styles['Heading3'],
-        fontSize=14,
-        textColor=colors.HexColor('#4b5563'),
-        spaceAfter=10
-    )
-    
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['BodyText'],
-        fontSize=11,
-        textColor=colors.HexColor('#1f2937'),
-        alignment=TA_JUSTIFY
-    )
-    
     # Title
-    elements.append(Paragraph("AI Fairness Audit Report", title_style))
+    elements.append(Paragraph("AI Fairness Audit Report", TITLE_STYLE))
     elements.append(Spacer(1, 0.2*inch))
     
     # Executive Summary
-    elements.append(Paragraph("Executive Summary", heading_style))
+    elements.append(Paragraph("Executive Summary", HEADING_STYLE))
     summary = data.get('summary', {})
     summary_text = f"""
     This report presents a comprehensive fairness audit of the AI system analyzing {data.get('dataset_name', 'the dataset')}. 
@@ -172,168 +373,151 @@ def generate_pdf_report(data: Dict[str, Any]) -> io.BytesIO:
     <b>Overall Assessment:</b> {summary.get('overall_assessment', 'Unknown')}<br/>
     <b>Fair Metrics:</b> {summary.get('fair', 0)} | <b>Warnings:</b> {summary.get('warning', 0)} | <b>Violations:</b> {summary.get('violation', 0)}
     """
-    elements.append(Paragraph(summary_text, body_style))
+    elements.append(Paragraph(summary_text, BODY_STYLE))
     elements.append(Spacer(1, 0.3*inch))
     
     # Dataset Information
-    elements.append(Paragraph("Dataset Information", heading_style))
-    dataset_info = [
-        ['Property', 'Value'],
-        ['Filename', data.get('dataset_name', 'N/A')],
-        ['Rows', str(data.get('rows', 'N/A'))],
-        ['Columns', str(data.get('columns', 'N/A'))],
-        ['Upload Date', data.get('upload_date', 'N/A')],
-        ['Protected Attribute', data.get('protected_attr', 'N/A')],
-        ['Report Generated', datetime.now().strftime('%Y-%m-%d %H:%M:%S')]
-    ]
+    elements.append(Paragraph("Dataset Information", HEADING_STYLE))
+    dataset_info = [['Property', 'Value']]
+    dataset_info += [[label, str(data.get(key, 'N/A'))] for label, key in DATASET_INFO_FIELDS]
+    dataset_info.append(['Report Generated', datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
     
-    dataset_table = Table(dataset_info, colWidths=[2*inch, 4*inch])
-    dataset_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    dataset_table = Table(dataset_info, colWidths=DATASET_COL_WIDTHS)
+    dataset_table.setStyle(DATASET_TABLE_STYLE)
     elements.append(dataset_table)
     elements.append(PageBreak())
     
     # Metrics Details
-    elements.append(Paragraph("Detailed Fairness Metrics Analysis", heading_style))
+    elements.append(Paragraph("Detailed Fairness Metrics Analysis", HEADING_STYLE))
     elements.append(Spacer(1, 0.2*inch))
     
     metrics = data.get('metrics', [])
+    display_names = [
+        metric.get('explanation', {}).get('display_name', metric.get('metric_name', 'Unknown').replace('_', ' ').title())
+        for metric in metrics
+    ]
+    
+    # Render the matplotlib charts up front so they render in parallel
+    report({'stage': 'charts'})
+    matplotlib_charts = render_matplotlib_charts({
+        i: (metric['visualization_data']['visualization_type'], metric['values'],
+            display_names[i], metric['visualization_data'].get('bins'))
+        for i, metric in enumerate(metrics)
+        if metric.get('visualization_data', {}).get('visualization_type') in CHART_ERRORS
+        and isinstance(metric.get('values'), dict)
+    })
     
     for i, metric in enumerate(metrics):
+        report({'stage': 'metric', 'current': i + 1, 'total': len(metrics)})
         # Metric name and assessment
-        metric_name = metric.get('metric_name', 'Unknown')
-        display_name = metric.get('explanation', {}).get('display_name', metric_name.replace('_', ' ').title())
+        display_name = display_names[i]
         assessment = metric.get('fairness_assessment', 'Unknown')
         
         # Color code assessment
-        assessment_color = colors.green if assessment == 'Fair' else colors.orange if assessment == 'Warning' else colors.red
+        assessment_color = ASSESSMENT_HEX.get(assessment, VIOLATION_HEX)
         
-        elements.append(Paragraph(f"{i+1}. {display_name}", subheading_style))
+        metric_elements = [Paragraph(f"{i+1}. {escape(display_name)}", SUBHEADING_STYLE)]
+        
+        # The narrative above the chart is one Paragraph, so ReportLab parses
+        # its markup once per metric rather than once per section
+        explanation_data = metric.get('explanation', {})
+        parts: List[str] = []
         
         # Assessment badge
-        assessment_text = f"<font color='{assessment_color.hexval()}'>● {assessment}</font>"
-        elements.append(Paragraph(assessment_text, body_style))
-        elements.append(Spacer(1, 0.1*inch))
+        parts.append(f"<font color='{assessment_color}'>● {escape(assessment)}</font>")
         
         # Definition
-        definition = metric.get('explanation', {}).get('definition', 'No definition available')
-        elements.append(Paragraph(f"<b>Definition:</b> {definition}", body_style))
-        elements.append(Spacer(1, 0.1*inch))
+        definition = explanation_data.get('definition', 'No definition available')
+        parts.append(f"<b>Definition:</b> {escape(definition)}")
         
         # What this means
-        explanation_data = metric.get('explanation', {})
         what_means = explanation_data.get('what_this_means', '')
         if what_means:
-            elements.append(Paragraph(f"<b>What This Means:</b> {what_means}", body_style))
-            elements.append(Spacer(1, 0.1*inch))
+            parts.append(f"<b>What This Means:</b> {escape(what_means)}")
         
         # What is wrong
         what_wrong = explanation_data.get('what_is_wrong', '')
         if what_wrong:
-            elements.append(Paragraph(f"<b>What Is Wrong:</b> {what_wrong}", body_style))
-            elements.append(Spacer(1, 0.1*inch))
+            parts.append(f"<b>What Is Wrong:</b> {escape(what_wrong)}")
         
         # Root causes
         root_causes = explanation_data.get('root_causes', [])
         if root_causes:
-            causes_text = "<b>Likely Root Causes:</b><br/>"
-            for cause in root_causes:
-                causes_text += f"&nbsp;&nbsp;• {cause}<br/>"
-            elements.append(Paragraph(causes_text, body_style))
-            elements.append(Spacer(1, 0.1*inch))
+            parts.append("<b>Likely Root Causes:</b>" + "".join(
+                ["<br/>&nbsp;&nbsp;• " + cause for cause in map(escape, root_causes)]))
         
         # Recruiter actions
         actions = explanation_data.get('recruiter_actions', [])
         if actions:
-            actions_text = "<b>Recommended Actions:</b><br/>"
-            for action in actions:
-                actions_text += f"&nbsp;&nbsp;✓ {action}<br/>"
-            elements.append(Paragraph(actions_text, body_style))
-            elements.append(Spacer(1, 0.1*inch))
+            parts.append("<b>Recommended Actions:</b>" + "".join(
+                ["<br/>&nbsp;&nbsp;✓ " + action for action in map(escape, actions)]))
         
         # Dashboard recommendation
         recommendation = explanation_data.get('dashboard_recommendation', '')
         if recommendation:
-            elements.append(Paragraph(f"<b>Recommendation:</b> {recommendation}", body_style))
-            elements.append(Spacer(1, 0.1*inch))
+            parts.append(f"<b>Recommendation:</b> {escape(recommendation)}")
         
         # Values
         values = metric.get('values', {})
         if isinstance(values, dict) and values:
-            values_text = "<b>Calculated Values:</b><br/>"
+            value_lines = ["<b>Calculated Values:</b>"]
             for group, value in values.items():
                 if isinstance(value, (int, float)):
-                    values_text += f"&nbsp;&nbsp;• {group}: {value:.4f}<br/>"
+                    value_lines.append(f"&nbsp;&nbsp;• {escape(str(group))}: {value:.4f}")
                 elif isinstance(value, dict):
-                    values_text += f"&nbsp;&nbsp;• {group}: {value}<br/>"
-            elements.append(Paragraph(values_text, body_style))
+                    value_lines.append(f"&nbsp;&nbsp;• {escape(str(group))}: {escape(str(value))}")
+            parts.append("<br/>".join(value_lines))
         elif isinstance(values, (int, float)):
-            elements.append(Paragraph(f"<b>Value:</b> {values:.4f}", body_style))
-        elements.append(Spacer(1, 0.1*inch))
+            parts.append(f"<b>Value:</b> {values:.4f}")
+        
+        metric_elements.append(Paragraph("<br/><br/>".join(parts), BODY_STYLE))
+        metric_elements.append(Spacer(1, 0.1*inch))
         
         # Visualization (if applicable)
         viz_data = metric.get('visualization_data', {})
         viz_type = viz_data.get('visualization_type')
         
         if viz_type == 'bar' and isinstance(values, dict):
+            # Bar values are usually plain rates already and can be charted as-is
+            numeric = all(isinstance(v, (int, float)) for v in values.values())
             try:
-                chart_buffer = create_bar_chart(
-                    {k: float(v) if isinstance(v, (int, float)) else float(v.get('rate', 0)) 
-                     for k, v in values.items() if isinstance(v, (int, float, dict))},
-                    display_name,
-                    "Rate"
-                )
-                img = Image(chart_buffer, width=5*inch, height=3*inch)
-                elements.append(img)
-                elements.append(Spacer(1, 0.1*inch))
+                chart_data = values if numeric else {
+                    k: float(v) if isinstance(v, (int, float)) else float(v.get('rate', 0))
+                    for k, v in values.items() if isinstance(v, (int, float, dict))
+                }
+                chart = create_bar_chart(chart_data, display_name, "Rate")
+                metric_elements.append(chart)
+                metric_elements.append(Spacer(1, 0.1*inch))
             except Exception as e:
                 print(f"Error creating chart: {e}")
         
-        elif viz_type == 'scatter' and isinstance(values, dict):
-            try:
-                chart_buffer = create_scatter_chart(values, display_name)
-                img = Image(chart_buffer, width=5*inch, height=3*inch)
-                elements.append(img)
-                elements.append(Spacer(1, 0.1*inch))
-            except Exception as e:
-                print(f"Error creating scatter plot: {e}")
-        elif viz_type == 'heatmap' and isinstance(values, dict):
-            try:
-                chart_buffer = create_heatmap_chart(values, viz_data.get('bins'), display_name)
-                img = Image(chart_buffer, width=5*inch, height=3*inch)
-                elements.append(img)
-                elements.append(Spacer(1, 0.1*inch))
-            except Exception as e:
-                print(f"Error creating heatmap: {e}")
+        elif matplotlib_charts.get(i) is not None:
+            # Image scales the vector drawing to the chart box
+            img = Image(matplotlib_charts[i], width=5*inch, height=3*inch)
+            metric_elements.append(img)
+            metric_elements.append(Spacer(1, 0.1*inch))
         
-        # Interpretation
-        interpretation = metric.get('explanation', {}).get('interpretation', '')
+        # Interpretation and recommendations below the chart
+        parts = []
+        interpretation = explanation_data.get('interpretation', '')
         if interpretation:
-            elements.append(Paragraph(f"<b>Interpretation:</b> {interpretation}", body_style))
-            elements.append(Spacer(1, 0.1*inch))
+            parts.append(f"<b>Interpretation:</b> {escape(interpretation)}")
         
-        # Recommendations
-        recommendations = metric.get('explanation', {}).get('recommendations', '')
+        recommendations = explanation_data.get('recommendations', '')
         if recommendations and assessment != 'Fair':
-            elements.append(Paragraph(f"<b>Recommendations:</b> {recommendations}", body_style))
+            parts.append(f"<b>Recommendations:</b> {escape(recommendations)}")
         
-        elements.append(Spacer(1, 0.3*inch))
+        if parts:
+            metric_elements.append(Paragraph("<br/><br/>".join(parts), BODY_STYLE))
         
-        # Page break every 3 metrics
-        if (i + 1) % 3 == 0 and i < len(metrics) - 1:
-            elements.append(PageBreak())
+        # Start a new page only when the section doesn't fit on this one
+        elements.append(CondPageBreak(2*inch))
+        elements.append(KeepTogether(metric_elements))
+        elements.append(Spacer(1, 0.3*inch))
     
     # Final Recommendations
     elements.append(PageBreak())
-    elements.append(Paragraph("Summary and Recommendations", heading_style))
+    elements.append(Paragraph("Summary and Recommendations", HEADING_STYLE))
     
     violation_count = summary.get('violation', 0)
     warning_count = summary.get('warning', 0)
@@ -370,7 +554,7 @@ def generate_pdf_report(data: Dict[str, Any]) -> io.BytesIO:
         3. Stay informed about fairness best practices
         """
     
-    elements.append(Paragraph(rec_text, body_style))
+    elements.append(Paragraph(rec_text, BODY_STYLE))
     elements.append(Spacer(1, 0.3*inch))
     
     # Footer
@@ -380,12 +564,55 @@ def generate_pdf_report(data: Dict[str, Any]) -> io.BytesIO:
     For questions or concerns about this audit, please consult with your organization's 
     AI ethics and compliance team.</i>
     """
-    elements.append(Paragraph(footer_text, body_style))
+    elements.append(Paragraph(footer_text, BODY_STYLE))
     
     # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    def page_done(canvas, doc):
+        report({'stage': 'page', 'page': canvas.getPageNumber()})
+    
+    doc.build(elements, onFirstPage=page_done, onLaterPages=page_done)
+    return sink.getvalue()
+
+# Recently generated reports keyed by a hash of their payload, so dashboards
+# re-posting the same analysis get the PDF back without rebuilding it
+PDF_CACHE_SIZE = int(os.getenv('PDF_CACHE', 64))
+pdf_cache: "OrderedDict[bytes, bytes]" = OrderedDict()
+pdf_cache_lock = threading.Lock()
+
+def get_pdf_report(data: Dict[str, Any], progress: Optional[ProgressCallback] = None) -> bytes:
+    """Return the PDF for a payload, reusing the cached copy of an identical one"""
+    key = hashlib.blake2b(orjson.dumps(data, option=orjson.OPT_SORT_KEYS), digest_size=16).digest()
+    with pdf_cache_lock:
+        pdf_bytes = pdf_cache.get(key)
+        if pdf_bytes is not None:
+            pdf_cache.move_to_end(key)
+            return pdf_bytes
+
+    pdf_bytes = generate_pdf_report(data, progress)
+    with pdf_cache_lock:
+        pdf_cache[key] = pdf_bytes
+        while len(pdf_cache) > PDF_CACHE_SIZE:
+            pdf_cache.popitem(last=False)
+    return pdf_bytes
+
+def report_filename(data: Dict[str, Any]) -> str:
+    """Download filename for a report"""
+    dataset_name = data.get('dataset_name', 'dataset').replace(' ', '_')
+    return f"fairness_audit_{dataset_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+
+def pdf_attachment(pdf_bytes: bytes, filename: str) -> Response:
+    """Send PDF bytes as a download"""
+    # BytesIO over existing bytes shares the buffer instead of copying it
+    return send_file(
+        io.BytesIO(pdf_bytes),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=filename
+    )
+
+def error_response(message: str, status: int) -> Response:
+    """JSON error body serialised with orjson"""
+    return Response(orjson.dumps({'error': message}), status=status, mimetype='application/json')
 
 @app.route('/generate-pdf', methods=['POST'])
 def generate_pdf():
@@ -393,27 +620,139 @@ def generate_pdf():
     Generate PDF report from analysis results
     """
     try:
-        data = request.json
+        # Parse the body with orjson rather than Flask's stdlib json provider;
+        # metric payloads are large and deeply nested
+        body = request.get_data(cache=False)
+        data = orjson.loads(body) if body else None
         
         if not data:
-            return jsonify({'error': 'No data provided'}), 400
+            return error_response('No data provided', 400)
         
         # Generate PDF
-        pdf_buffer = generate_pdf_report(data)
+        pdf_bytes = get_pdf_report(data)
         
-        # Create filename
-        dataset_name = data.get('dataset_name', 'dataset').replace(' ', '_')
-        filename = f"fairness_audit_{dataset_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        return pdf_attachment(pdf_bytes, report_filename(data))
+    
+    except Exception as e:
+        return error_response(str(e), 500)
+
+class ReportJob:
+    """A report being generated in the background, with its progress events"""
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self.pdf: Optional[bytes] = None
+        self.error: Optional[str] = None
+        self.finished = threading.Event()
+
+# Background report jobs by id; the oldest finished jobs are dropped past the limit
+MAX_REPORT_JOBS = int(os.getenv('PDF_JOBS', 32))
+report_jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+report_jobs_lock = threading.Lock()
+
+# Jobs run on a fixed pool, and a new job is refused while every worker is busy,
+# so a burst of starts can't create unbounded rendering threads
+REPORT_WORKERS = int(os.getenv('PDF_JOB_WORKERS', 2))
+report_executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS)
+report_slots = threading.BoundedSemaphore(REPORT_WORKERS)
+
+# Each open progress stream holds a waitress thread, so only half of them can be
+# streaming at once, and a stream ends after PROGRESS_TIMEOUT seconds (EventSource
+# clients reconnect on their own)
+PDF_THREADS = int(os.getenv('PDF_THREADS', 8))
+PROGRESS_TIMEOUT = float(os.getenv('PDF_PROGRESS_TIMEOUT', 120))
+progress_streams = threading.BoundedSemaphore(max(1, PDF_THREADS // 2))
+
+def run_report_job(job: ReportJob, data: Dict[str, Any]):
+    """Generate a job's PDF, posting progress events as it goes"""
+    try:
+        job.pdf = get_pdf_report(data, job.events.put)
+        job.events.put({'stage': 'done'})
+    except Exception as e:
+        job.error = str(e)
+        job.events.put({'stage': 'error', 'error': job.error})
+    finally:
+        job.finished.set()
+        report_slots.release()
+
+@app.route('/generate-pdf/start', methods=['POST'])
+def start_pdf_job():
+    """
+    Start generating a PDF report in the background and return its job id
+    """
+    try:
+        body = request.get_data(cache=False)
+        data = orjson.loads(body) if body else None
         
-        return send_file(
-            pdf_buffer,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=filename
-        )
+        if not data:
+            return error_response('No data provided', 400)
+        
+        job_id = uuid.uuid4().hex
+        job = ReportJob(report_filename(data))
+        if not report_slots.acquire(blocking=False):
+            return error_response('Too many reports in progress, try again shortly', 503)
+        with report_jobs_lock:
+            report_jobs[job_id] = job
+            # Drop the oldest finished jobs once past the limit
+            excess = len(report_jobs) - MAX_REPORT_JOBS
+            for old_id in [k for k, v in report_jobs.items() if v.finished.is_set()][:max(excess, 0)]:
+                del report_jobs[old_id]
+        
+        report_executor.submit(run_report_job, job, data)
+        return Response(orjson.dumps({'job_id': job_id}), status=202, mimetype='application/json')
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(str(e), 500)
+
+@app.route('/progress/<job_id>', methods=['GET'])
+def pdf_job_progress(job_id: str):
+    """
+    Stream a report job's progress as Server-Sent Events
+    """
+    job = report_jobs.get(job_id)
+    if job is None:
+        return error_response('Job not found', 404)
+    
+    if not progress_streams.acquire(blocking=False):
+        return error_response('Too many progress streams open, try again shortly', 503)
+    
+    def events():
+        deadline = time.monotonic() + PROGRESS_TIMEOUT
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event = job.events.get(timeout=min(15, remaining))
+            except queue.Empty:
+                if job.finished.is_set():
+                    # Events were already consumed by an earlier connection
+                    event = {'stage': 'error', 'error': job.error} if job.error else {'stage': 'done'}
+                else:
+                    yield ": keep-alive\n\n"
+                    continue
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+            if event['stage'] in ('done', 'error'):
+                return
+    
+    response = Response(stream_with_context(events()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(progress_streams.release)
+    return response
+
+@app.route('/download/<job_id>', methods=['GET'])
+def download_pdf_job(job_id: str):
+    """
+    Download the PDF of a finished report job
+    """
+    job = report_jobs.get(job_id)
+    if job is None:
+        return error_response('Job not found', 404)
+    if job.error:
+        return error_response(job.error, 500)
+    if job.pdf is None:
+        return error_response('Report is still being generated', 409)
+    return pdf_attachment(job.pdf, job.filename)
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -423,4 +762,9 @@ def health():
 if __name__ == '__main__':
     host = os.getenv('FLASK_HOST', '0.0.0.0')
     port = int(os.getenv('FLASK_PORT', 5001))
-    app.run(host=host, port=port, debug=True)
+    # Waitress serves requests from a thread pool, so concurrent reports no
+    # longer queue behind each other the way they do on the dev server
+    from waitress import serve
+    # Start the chart workers' pool before waitress starts its threads
+    get_chart_pool()
+    serve(app, host=host, port=port, threads=PDF_THREADS)